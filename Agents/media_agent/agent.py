@@ -9,6 +9,7 @@ from google.adk.agents import LlmAgent, ParallelAgent, SequentialAgent
 from .sub_agents.news import news_agent
 from .sub_agents.reddit import  reddit_agent
 from .sub_agents.fuser import fuser_agent
+from .sub_agents.summary import summary_agent
 
 from pydantic import BaseModel, Field
 from typing import Literal
@@ -48,7 +49,10 @@ seq_agent=SequentialAgent(
     sub_agents=[par_agent,fuser_agent],
     
 )
-root_agent=seq_agent
+
+# summary_agent fetches both sources in Python and clusters them locally before its single model call,
+# instead of two tool-calling agents plus a fuser. seq_agent is kept for comparison.
+root_agent=summary_agent
 
 
 
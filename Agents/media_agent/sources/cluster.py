@@ -0,0 +1,152 @@
+import hashlib
+import math
+import re
+from collections import Counter, defaultdict
+
+# Groups news articles and Reddit posts that describe the same incident.
+# MinHash LSH over word features proposes candidate pairs, TF-IDF cosine
+# confirms them, and items naming different localities are never merged.
+
+NUM_PERM = 32
+BANDS = 16  # 2 rows per band: pairs with Jaccard around 0.25 and up become candidates
+COSINE_THRESHOLD = 0.35
+
+_STOPWORDS = {
+    "a", "an", "the", "in", "at", "on", "of", "to", "for", "and", "or", "is", "are", "was", "were",
+    "be", "by", "with", "near", "from", "as", "has", "have", "its", "it", "this", "that", "i", "my",
+    "me", "we", "you", "they", "so", "but", "not", "any", "just", "what", "how", "why", "who", "can",
+}
+
+def _words(text):
+    return [w for w in re.findall(r"[a-z0-9]+", (text or "").lower()) if w not in _STOPWORDS and len(w) > 1]
+
+def _minhash(features):
+    """
+    One-permutation MinHash: each feature is hashed once into one of NUM_PERM
+    bins, keeping the minimum per bin. Empty bins borrow from the next filled
+    one (rotation densification), so the cost is linear in the number of features.
+    """
+    bins = [None] * NUM_PERM
+    for f in features:
+        h = int.from_bytes(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest(), "big")
+        b, v = h % NUM_PERM, h // NUM_PERM
+        if bins[b] is None or v < bins[b]:
+            bins[b] = v
+    if all(v is None for v in bins):
+        return None
+    signature = []
+    for i in range(NUM_PERM):
+        j = i
+        while bins[j] is None:
+            j = (j + 1) % NUM_PERM
+        signature.append((bins[j], j - i))
+    return signature
+
+def _tfidf(docs):
+    df = Counter(w for doc in docs for w in set(doc))
+    n = len(docs)
+    vectors = []
+    for doc in docs:
+        tf = Counter(doc)
+        vec = {w: (c / len(doc)) * math.log((1 + n) / (1 + df[w]) + 1) for w, c in tf.items()} if doc else {}
+        norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+        vectors.append({w: v / norm for w, v in vec.items()})
+    return vectors
+
+def _cosine(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(w, 0.0) for w, v in a.items())
+
+def _item_text(item):
+    return f"{item.get('title', '')} {item.get('text') or item.get('summary') or ''}"
+
+def cluster_items(items, cosine_threshold=COSINE_THRESHOLD):
+    """
+    Returns clusters as lists of item indexes, largest first.
+    Items need title/text (or summary) and may carry a "localities" list.
+    """
+    docs = [_words(_item_text(item)) for item in items]
+    rows = NUM_PERM // BANDS
+
+    buckets = defaultdict(list)
+    for i, doc in enumerate(docs):
+        signature = _minhash(set(doc) | {f"{a} {b}" for a, b in zip(doc, doc[1:])})
+        if signature is None:
+            continue
+        for band in range(BANDS):
+            buckets[(band, tuple(signature[band * rows:(band + 1) * rows]))].append(i)
+
+    candidates = {(a, b) for members in buckets.values() for a in members for b in members if a < b}
+
+    vectors = _tfidf(docs)
+    parent = list(range(len(items)))
+    # Localities of each cluster, kept on its root: merges are transitive, so
+    # checking only the candidate pair would let an untagged item join two
+    # clusters from different localities
+    localities = [set(item.get("localities") or []) for item in items]
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    scored = sorted(
+        ((_cosine(vectors[a], vectors[b]), a, b) for a, b in candidates),
+        key=lambda c: (-c[0], c[1], c[2]),
+    )
+    for score, a, b in scored:
+        if score < cosine_threshold:
+            break
+        root_a, root_b = find(a), find(b)
+        if root_a == root_b:
+            continue
+        loc_a, loc_b = localities[root_a], localities[root_b]
+        if loc_a and loc_b and not loc_a & loc_b:
+            continue
+        parent[root_a] = root_b
+        localities[root_b] = loc_a | loc_b
+
+    groups = defaultdict(list)
+    for i in range(len(items)):
+        groups[find(i)].append(i)
+    return sorted(groups.values(), key=lambda g: (-len(g), g[0]))
+
+def fuse(items, cosine_threshold=COSINE_THRESHOLD):
+    """
+    Clusters items and returns one record per cluster: its localities, a
+    per-source count and the member items (title, text, source and up to
+    three comments).
+    """
+    fused = []
+    for n, members in enumerate(cluster_items(items, cosine_threshold)):
+        localities = []
+        for i in members:
+            localities.extend(l for l in items[i].get("localities") or [] if l not in localities)
+        fused.append({
+            "cluster": n + 1,
+            "localities": localities,
+            "sources": dict(Counter(items[i].get("source", "unknown") for i in members)),
+            "items": [
+                {"source": items[i].get("source"), "title": items[i].get("title", ""),
+                 "text": items[i].get("text") or items[i].get("summary") or "",
+                 **({"comments": items[i]["comments"][:3]} if items[i].get("comments") else {})}
+                for i in members
+            ],
+        })
+    return fused
+
+def describe_cluster(cluster, max_chars=240):
+    """
+    One line for a single-source cluster, written without a model: the first
+    item's title and text, with the number of reports when there are several.
+    """
+    item = cluster["items"][0]
+    where = f"[{', '.join(cluster['localities'])}] " if cluster["localities"] else ""
+    detail = " ".join(item["text"].split())
+    line = f"{where}{item['title']}" + (f": {detail}" if detail else "")
+    if len(line) > max_chars:
+        line = line[:max_chars].rsplit(" ", 1)[0] + "…"
+    count = len(cluster["items"])
+    return f"{line} ({item['source']}" + (f", {count} reports)" if count > 1 else ")")
@@ -0,0 +1,107 @@
+import html
+import json
+import re
+
+from .gazetteer import tag_localities
+
+# Shrinks source items before they reach an agent prompt: markup is stripped,
+# near-duplicate comments are dropped and every source is cut to a token budget.
+# Comments arrive ranked by score (see RedditFeed), so budget cuts drop the
+# lowest-ranked ones first, and sentences or comments naming a locality are kept
+# ahead of those that don't.
+
+_TAG = re.compile(r"<[^>]+>")
+_MD_LINK = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+_URL = re.compile(r"https?://\S+")
+_MD_MARKS = re.compile(r"(\*\*|__|~~|`|^\s*[>#]+\s*)", re.MULTILINE)
+_SENTENCE = re.compile(r"(?<=[.!?])\s+")
+_WORD = re.compile(r"\w+")
+
+def strip_markup(text):
+    """Plain text from HTML / Markdown, with links reduced to their labels."""
+    text = html.unescape(text or "")
+    text = _TAG.sub(" ", text)
+    text = _MD_LINK.sub(r"\1", text)
+    text = _URL.sub("", text)
+    text = _MD_MARKS.sub("", text)
+    return " ".join(text.split())
+
+def estimate_tokens(text):
+    # ~4 characters per token for English prose; close enough for budgeting
+    return (len(text) + 3) // 4
+
+def _shingles(text, size=3):
+    words = _WORD.findall(text.lower())
+    if len(words) < size:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def dedupe(texts, threshold=0.8):
+    """Drops texts whose word shingles overlap an earlier kept text by >= threshold (Jaccard)."""
+    kept, kept_shingles = [], []
+    for text in texts:
+        shingles = _shingles(text)
+        if any(len(shingles & s) / len(shingles | s) >= threshold for s in kept_shingles):
+            continue
+        kept.append(text)
+        kept_shingles.append(shingles)
+    return kept
+
+def truncate(text, max_tokens):
+    """Cuts text to max_tokens, keeping sentences that name a locality first, in original order."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    sentences = _SENTENCE.split(text)
+    ranked = sorted(range(len(sentences)), key=lambda i: (not tag_localities(sentences[i]), i))
+    chosen, used = set(), 0
+    for i in ranked:
+        cost = estimate_tokens(sentences[i]) + 1
+        if used + cost <= max_tokens:
+            chosen.add(i)
+            used += cost
+    if not chosen:
+        return text[:max_tokens * 4].rsplit(" ", 1)[0] + "…"
+    return " ".join(sentences[i] for i in sorted(chosen))
+
+def compact_items(items, budget_tokens, text_keys=("title", "text"), list_key=None,
+                  keep_keys=(), list_limit=10, text_share=0.5):
+    """
+    Returns compacted copies of items within roughly budget_tokens.
+
+    text_keys are cleaned and truncated, list_key (e.g. comments) is cleaned,
+    de-duplicated and filled greedily in rank order, and keep_keys are copied
+    as-is. Budget left unused by one item rolls over to the next.
+    """
+    if not items:
+        return []
+    compacted, remaining = [], budget_tokens
+    for n, item in enumerate(items):
+        share = remaining // (len(items) - n)
+        out = {key: item[key] for key in keep_keys if key in item}
+        used = estimate_tokens(json.dumps(out))
+        text_budget = max(int(share * text_share) if list_key else share, 16)
+        for key in text_keys:
+            text = truncate(strip_markup(item.get(key)), max(text_budget - used, 16))
+            out[key] = text
+            used += estimate_tokens(text)
+
+        if list_key:
+            entries = dedupe([t for t in (strip_markup(e) for e in item.get(list_key) or []) if t])
+            entries.sort(key=lambda e: not tag_localities(e))  # stable: score order within each group
+            kept = []
+            for entry in entries:
+                if len(kept) >= list_limit:
+                    break
+                cost = estimate_tokens(entry) + 1
+                if used + cost <= share:
+                    kept.append(entry)
+                    used += cost
+            out[list_key] = kept
+
+        compacted.append(out)
+        remaining -= used
+    return compacted
+
+def to_json(data):
+    """Compact JSON for prompts: no indentation, no ASCII escaping."""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
@@ -0,0 +1,152 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import praw
+
+from .gazetteer import resolve_locality, tag_localities
+
+class RedditFeed:
+    """
+    One Reddit ingestion layer for every agent tool that reads r/bengaluru.
+
+    - the praw client is created once and reused
+    - the newest listing_limit posts are cached for ttl_seconds
+    - comments are fetched once per post ID and kept across refreshes
+    - titles, bodies and comments are indexed by canonical locality
+
+    Localities with no hit in the recent listing fall back to one subreddit
+    search, cached per locality for the same TTL.
+
+    Comment forests are loaded on a bounded thread pool. Each request is capped
+    by the client timeout and the whole batch by comment_timeout. Posts that
+    time out or fail get no comments and are retried on the next refresh.
+    """
+
+    def __init__(self, subreddit="bengaluru", listing_limit=25, comment_limit=100,
+                 comment_max_chars=500, comment_workers=8, comment_timeout=10,
+                 ttl_seconds=300, clock=time.time, client_factory=None):
+        self.subreddit_name = subreddit
+        self.listing_limit = listing_limit
+        self.comment_limit = comment_limit
+        self.comment_max_chars = comment_max_chars
+        self.comment_workers = comment_workers
+        self.comment_timeout = comment_timeout
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._client_factory = client_factory or (lambda: praw.Reddit(
+            client_id=os.getenv("REDDIT_CLIENT_ID"),
+            client_secret=os.getenv("REDDIT_SECRET"),
+            user_agent="city_intel_agent",
+            timeout=comment_timeout
+        ))
+        self._client = None
+        self._lock = threading.RLock()
+        self._fetched_at = None
+        self._posts = []
+        self._comments = {}
+        self._index = {}
+        self._searches = {}
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                self._client = self._client_factory()
+            return self._client
+
+    def _post_record(self, submission):
+        return {
+            "id": submission.id,
+            "title": submission.title,
+            "text": submission.selftext,
+            "url": submission.url,
+            "created_utc": submission.created_utc,
+            "score": submission.score,
+            "num_comments": submission.num_comments,
+            "source": "reddit"
+        }
+
+    def _fetch_comments(self, submission):
+        """Highest-scored comments first, capped in count and length."""
+        submission.comments.replace_more(limit=0)
+        comments = [c for c in submission.comments.list() if getattr(c, "body", None) not in (None, "[deleted]", "[removed]")]
+        comments.sort(key=lambda c: getattr(c, "score", 0) or 0, reverse=True)
+        return [c.body[:self.comment_max_chars] for c in comments[:self.comment_limit]]
+
+    def _load_comments(self, submissions):
+        """Returns {post_id: comments}, fetching only posts not seen before, in parallel."""
+        pending = [s for s in submissions if s.id not in self._comments]
+        if pending:
+            pool = ThreadPoolExecutor(max_workers=min(self.comment_workers, len(pending)))
+            futures = {pool.submit(self._fetch_comments, s): s.id for s in pending}
+            done, not_done = wait(futures, timeout=self.comment_timeout)
+            pool.shutdown(wait=False, cancel_futures=True)
+            for future in done:
+                try:
+                    comments = future.result()
+                except Exception as e:
+                    print(f"⚠️ Comment fetch failed for {futures[future]}: {e}")
+                    continue
+                with self._lock:
+                    self._comments[futures[future]] = comments
+            if not_done:
+                print(f"⚠️ Comment fetch timed out for {len(not_done)} posts")
+        return {s.id: self._comments.get(s.id, []) for s in submissions}
+
+    def _stale(self, fetched_at):
+        return fetched_at is None or self._clock() - fetched_at >= self.ttl_seconds
+
+    def _refresh(self):
+        submissions = list(self.client.subreddit(self.subreddit_name).new(limit=self.listing_limit))
+        comments = self._load_comments(submissions)
+        posts, index = [], {}
+        for submission in submissions:
+            post = {**self._post_record(submission), "comments": comments[submission.id]}
+            posts.append(post)
+            post["localities"] = tag_localities(" ".join([post["title"], post["text"] or ""] + post["comments"]))
+            for locality in post["localities"]:
+                index.setdefault(locality, []).append(post)
+
+        # Forget comments for posts that dropped out of the listing
+        live_ids = {post["id"] for post in posts}
+        self._comments = {pid: c for pid, c in self._comments.items() if pid in live_ids}
+        self._posts, self._index = posts, index
+        self._fetched_at = self._clock()
+
+    def recent_posts(self, limit=10):
+        """Newest posts with their comments, newest first."""
+        with self._lock:
+            if self._stale(self._fetched_at):
+                self._refresh()
+            return self._posts[:limit]
+
+    def search(self, locality, limit=5):
+        """Recent posts mentioning the locality (or any of its aliases)."""
+        with self._lock:
+            if self._stale(self._fetched_at):
+                self._refresh()
+            canonical = resolve_locality(locality)
+            hits = self._index.get(canonical, []) if canonical else []
+            if hits:
+                return hits[:limit]
+
+            key = (canonical or locality).lower()
+            cached = self._searches.get(key)
+            if cached and not self._stale(cached[0]):
+                return cached[1][:limit]
+
+        # Network search runs outside the lock so searches for different localities overlap
+        submissions = list(self.client.subreddit(self.subreddit_name).search(locality, sort="new", limit=limit))
+        comments = self._load_comments(submissions)
+        results = []
+        for submission in submissions:
+            post = {**self._post_record(submission), "comments": comments[submission.id]}
+            post["localities"] = tag_localities(" ".join([post["title"], post["text"] or ""] + post["comments"]))
+            results.append(post)
+        with self._lock:
+            self._searches[key] = (self._clock(), results)
+        return results
+
+reddit_feed = RedditFeed()
@@ -12,6 +12,8 @@ fuser_agent=Agent(
         You are a fuser agent. You will receive summary of the events that happened
         in the past few minutes from two different sources. reddit and timesofindia.
         Your job is to fuse the summaries into one single summary of multiple events
+        If both sources reply NO_NEW_ITEMS, reply with exactly: NO_NEW_ITEMS
+        If only one of them does, fuse the other one alone.
     
     """
 )
\ No newline at end of file
@@ -5,32 +5,50 @@ from datetime import datetime
 from typing import List, Dict
 import os
 from dotenv import load_dotenv
+from google.adk.tools import ToolContext
+from ...sources.checkpoint import DEFAULT_CONSUMER, PENDING_STATE_PREFIX, checkpoints
+from ...sources.compact import compact_items, to_json
+from ...sources.toi import toi_feed
 
 load_dotenv()
 
+NEWS_TOKEN_BUDGET = int(os.getenv("NEWS_TOKEN_BUDGET", "1500"))
+
 
 
 
 # ------------------------------
 # Tool 1: News Article Fetcher
 # ------------------------------
-def get_recent_news_articles() -> str:
+NEWS_SOURCE = "toi_bengaluru"
+
+def new_news_items(consumer=DEFAULT_CONSUMER):
     """
-    Fetches news from a Bengaluru-specific RSS feed and returns a list of articles.
+    Compacted TOI articles `consumer` has not processed yet (possibly empty),
+    and the checkpoint record to commit once it has (None if there is nothing
+    to commit).
     """
-    rss_url = "https://timesofindia.indiatimes.com/rssfeeds/-2128833038.cms"
-    feed = feedparser.parse(rss_url)
-
-    articles = []
-    for entry in feed.entries[:10]:
-        articles.append({
-            "id": entry.get("id", entry.get("link", "")),
-            "title": entry.title,
-            "summary": entry.get("summary", ""),
-            "link": entry.link,
-            "published": entry.get("published", ""),
-            "source": "news"
-        })
-    return str(articles)
-
-
+    entries = sorted(toi_feed.entries(), key=lambda a: a["published_ts"], reverse=True)
+    try:
+        entries, pending = checkpoints.peek(consumer, NEWS_SOURCE, entries, limit=10, created_key="published_ts")
+    except Exception as e:
+        print(f"⚠️ Checkpoint store unavailable, returning latest articles: {e}")
+        entries, pending = entries[:10], None
+
+    return compact_items(
+        [{**entry, "source": "news"} for entry in entries],
+        NEWS_TOKEN_BUDGET,
+        text_keys=("title", "summary"),
+        keep_keys=("id", "link", "published", "localities", "source"),
+    ), pending
+
+def get_recent_news_articles(tool_context: ToolContext) -> str:
+    """
+    Fetches news from a Bengaluru-specific RSS feed and returns a list of articles
+    that were not processed by an earlier run.
+    """
+    articles, pending = new_news_items(tool_context.state.get("consumer", DEFAULT_CONSUMER))
+    tool_context.state[PENDING_STATE_PREFIX + NEWS_SOURCE] = pending
+    if not articles:
+        return "No new news articles since the last run."
+    return to_json(articles)
@@ -16,6 +16,10 @@ reddit_agent=Agent(
         Summarize the fetched posts and comments into one single string.
         While summarizing, clearly mention the location names and
         names of the objects like school names, street names etc
+        Each item has a "localities" list with the Bengaluru localities it names;
+        use those exact names when you mention them.
+        The tool only returns items you have not seen before. If it says there are
+        no new Reddit posts, reply with exactly: NO_NEW_ITEMS
     """,
     tools=[get_recent_posts_with_details],
 
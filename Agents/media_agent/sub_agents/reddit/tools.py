@@ -5,34 +5,50 @@ from datetime import datetime
 from typing import List, Dict
 import os
 from dotenv import load_dotenv
+from google.adk.tools import ToolContext
+from ...sources.checkpoint import DEFAULT_CONSUMER, PENDING_STATE_PREFIX, checkpoints
+from ...sources.compact import compact_items, to_json
+from ...sources.reddit import reddit_feed
 
 load_dotenv()
 
+REDDIT_TOKEN_BUDGET = int(os.getenv("REDDIT_TOKEN_BUDGET", "3000"))
+
 
 
 #--------------------------------
 # Tool 1: Reddit Post Fetcher
 # ------------------------------
-def get_recent_posts_with_details() -> str:
+REDDIT_SOURCE = "reddit_bengaluru"
+
+def new_reddit_items(consumer=DEFAULT_CONSUMER):
+    """
+    Compacted r/bengaluru posts `consumer` has not processed yet (possibly
+    empty), and the checkpoint record to commit once it has (None if there is
+    nothing to commit).
+    """
+    recent = reddit_feed.recent_posts(limit=reddit_feed.listing_limit)
+    try:
+        recent, pending = checkpoints.peek(consumer, REDDIT_SOURCE, recent, limit=10)
+    except Exception as e:
+        print(f"⚠️ Checkpoint store unavailable, returning latest posts: {e}")
+        recent, pending = recent[:10], None
+
+    return compact_items(
+        recent,
+        REDDIT_TOKEN_BUDGET,
+        text_keys=("title", "text"),
+        list_key="comments",
+        keep_keys=("id", "url", "created_utc", "score", "num_comments", "localities", "source"),
+    ), pending
+
+def get_recent_posts_with_details(tool_context: ToolContext) -> str:
     """
-    Fetches recent posts from r/bengaluru on Reddit and returns a list of JSON dictionaries.
+    Fetches recent posts from r/bengaluru on Reddit and returns a list of JSON dictionaries
+    for the posts that were not processed by an earlier run.
     """
-    reddit = praw.Reddit(
-        client_id=os.getenv("REDDIT_CLIENT_ID"),
-        client_secret=os.getenv("REDDIT_SECRET"),
-        user_agent="city_intel_agent"
-    )
-
-    posts = []
-    for post in reddit.subreddit("bengaluru").new(limit=10):
-        posts.append({
-            "id": post.id,
-            "title": post.title,
-            "url": post.url,
-            "created_utc": post.created_utc,
-            "score": post.score,
-            "num_comments": post.num_comments,
-            "comments": [c.body for c in post.comments[:100] if hasattr(c, 'body')],
-            "source": "reddit"
-        })
-    return str(posts)
\ No newline at end of file
+    posts, pending = new_reddit_items(tool_context.state.get("consumer", DEFAULT_CONSUMER))
+    tool_context.state[PENDING_STATE_PREFIX + REDDIT_SOURCE] = pending
+    if not posts:
+        return "No new Reddit posts since the last run."
+    return to_json(posts)
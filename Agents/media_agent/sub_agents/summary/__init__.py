@@ -0,0 +1 @@
+from .agent import summary_agent
\ No newline at end of file
@@ -0,0 +1,81 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from google.adk import Agent
+from google.adk.agents.callback_context import CallbackContext
+from google.genai import types
+
+from ..news.tools import NEWS_SOURCE, new_news_items
+from ..reddit.tools import REDDIT_SOURCE, new_reddit_items
+from ...sources.checkpoint import DEFAULT_CONSUMER, PENDING_STATE_PREFIX
+from ...sources.cluster import describe_cluster, fuse
+from ...sources.compact import to_json
+
+NO_NEW_ITEMS = "NO_NEW_ITEMS"
+
+def _text(text):
+    return types.Content(role="model", parts=[types.Part(text=text)])
+
+def prefetch_sources(callback_context: CallbackContext) -> Optional[types.Content]:
+    """
+    Fetches the new TOI articles and Reddit posts concurrently, in plain Python,
+    and clusters items that describe the same incident. Only clusters fusing
+    news and Reddit are left for the model to phrase; single-source clusters
+    are written out locally from their first item. With nothing new, or nothing
+    to fuse across sources, the model is not called.
+
+    Items are new for the session's "consumer" (set by the caller when it
+    creates the session). The checkpoint records are left in state for the
+    caller to commit once its pipeline has succeeded.
+    """
+    consumer = callback_context.state.get("consumer", DEFAULT_CONSUMER)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        news = pool.submit(new_news_items, consumer)
+        reddit = pool.submit(new_reddit_items, consumer)
+        (news_items, news_pending), (reddit_items, reddit_pending) = news.result(), reddit.result()
+    callback_context.state[PENDING_STATE_PREFIX + NEWS_SOURCE] = news_pending
+    callback_context.state[PENDING_STATE_PREFIX + REDDIT_SOURCE] = reddit_pending
+    items = news_items + reddit_items
+
+    if not items:
+        return _text(NO_NEW_ITEMS)
+
+    clusters = fuse(items)
+    merged = [c for c in clusters if len(c["sources"]) > 1]
+    local_summary = "\n".join(describe_cluster(c) for c in clusters if len(c["sources"]) == 1)
+    print(f"📥 Prefetched {len(items)} items into {len(clusters)} clusters, {len(merged)} to phrase")
+
+    if not merged:
+        callback_context.state["local_summary"] = ""
+        return _text(local_summary)
+
+    callback_context.state["clusters"] = to_json(merged)
+    callback_context.state["local_summary"] = local_summary
+    return None
+
+def append_local_summary(callback_context: CallbackContext) -> Optional[types.Content]:
+    """Adds the locally written single-source lines after the model's cluster summary."""
+    local_summary = callback_context.state.get("local_summary")
+    return _text(local_summary) if local_summary else None
+
+summary_agent=Agent(
+    name="summary_agent",
+    model="gemini-2.5-flash",
+    description="Summarizes clusters of related Times of India articles and r/bengaluru posts into one summary of events",
+    instruction="""
+        You are a news and social media summarizer agent for Bengaluru.
+        These are clusters of new items from timesofindia and reddit. Each cluster
+        groups items that describe the same incident, with its localities and how
+        many items came from each source.
+
+        {clusters}
+
+        Write one or two lines per cluster describing the incident, fusing what the
+        items say. While summarizing, clearly mention the location names and
+        names of the objects like school names, street names etc
+        Use the names in each cluster's "localities" list when you mention them.
+        Output only the lines, one cluster after another.
+    """,
+    before_agent_callback=prefetch_sources,
+    after_agent_callback=append_local_summary,
+)
@@ -0,0 +1,121 @@
+# bench_reddit.py
+#
+# Compares serial vs bounded-parallel comment loading in RedditFeed by
+# replaying recorded PRAW responses with their original per-post latency.
+#
+#   python bench_reddit.py --record reddit_recording.json   # needs REDDIT_* env vars
+#   python bench_reddit.py --replay reddit_recording.json
+#   python bench_reddit.py --synthetic 25                   # no recording needed
+
+import argparse
+import json
+import random
+import time
+from types import SimpleNamespace
+
+from mm_agent.sources.reddit import RedditFeed
+
+def record(path, limit):
+    feed = RedditFeed()
+    posts = []
+    for submission in feed.client.subreddit(feed.subreddit_name).new(limit=limit):
+        started = time.perf_counter()
+        submission.comments.replace_more(limit=0)
+        comments = [{"body": c.body, "score": c.score} for c in submission.comments.list()]
+        latency = time.perf_counter() - started
+        posts.append({
+            "id": submission.id,
+            "title": submission.title,
+            "selftext": submission.selftext,
+            "url": submission.url,
+            "created_utc": submission.created_utc,
+            "score": submission.score,
+            "num_comments": submission.num_comments,
+            "comments": comments,
+            "latency": latency,
+        })
+        print(f"📥 {submission.id}: {len(comments)} comments in {latency:.2f}s")
+    with open(path, "w") as f:
+        json.dump(posts, f, indent=2)
+    print(f"✅ Recorded {len(posts)} posts to {path}")
+
+def synthetic(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"p{i}",
+            "title": f"Post {i} about Koramangala traffic",
+            "selftext": "",
+            "url": f"https://reddit.com/p{i}",
+            "created_utc": 1_700_000_000 + i,
+            "score": rng.randint(0, 500),
+            "num_comments": 40,
+            "comments": [{"body": "comment " * rng.randint(5, 200), "score": rng.randint(-5, 300)} for _ in range(40)],
+            "latency": rng.uniform(0.3, 1.5),
+        }
+        for i in range(count)
+    ]
+
+class _ReplayForest:
+    def __init__(self, post):
+        self._post = post
+
+    def replace_more(self, limit=0):
+        time.sleep(self._post["latency"])
+
+    def list(self):
+        return [SimpleNamespace(**c) for c in self._post["comments"]]
+
+def _submission(post):
+    return SimpleNamespace(
+        id=post["id"], title=post["title"], selftext=post["selftext"], url=post["url"],
+        created_utc=post["created_utc"], score=post["score"], num_comments=post["num_comments"],
+        comments=_ReplayForest(post),
+    )
+
+def _replay_client(posts):
+    subreddit = SimpleNamespace(
+        new=lambda limit: [_submission(p) for p in posts[:limit]],
+        search=lambda query, sort="new", limit=5: [],
+    )
+    return SimpleNamespace(subreddit=lambda name: subreddit)
+
+def run(posts, workers, timeout):
+    feed = RedditFeed(
+        listing_limit=len(posts), comment_workers=workers, comment_timeout=timeout,
+        client_factory=lambda: _replay_client(posts),
+    )
+    started = time.perf_counter()
+    loaded = feed.recent_posts(limit=len(posts))
+    elapsed = time.perf_counter() - started
+    with_comments = sum(1 for p in loaded if p["comments"])
+    chars = sum(len(c) for p in loaded for c in p["comments"])
+    return elapsed, with_comments, chars
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--record")
+    parser.add_argument("--replay")
+    parser.add_argument("--synthetic", type=int)
+    parser.add_argument("--limit", type=int, default=25)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=10)
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record, args.limit)
+        return
+    if args.replay:
+        with open(args.replay) as f:
+            posts = json.load(f)
+    else:
+        posts = synthetic(args.synthetic or args.limit)
+
+    serial_total = sum(p["latency"] for p in posts)
+    print(f"📊 {len(posts)} posts, recorded comment latency {serial_total:.2f}s total")
+    for label, workers in (("serial", 1), (f"parallel x{args.workers}", args.workers)):
+        elapsed, with_comments, chars = run(posts, workers, max(args.timeout, serial_total + 1) if workers == 1 else args.timeout)
+        print(f"⏱️ {label:>12}: {elapsed:.2f}s, {with_comments}/{len(posts)} posts with comments, {chars} comment chars")
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 from google.adk.agents import LlmAgent, ParallelAgent, SequentialAgent
 from google.adk import Agent
 from google.adk.tools import google_search
-from .tools import reddit_search, toi_search
+from .tools import lexicon_mood, reddit_search, reddit_search_batch, toi_search, toi_search_batch
 
 from datetime import datetime
 from dotenv import load_dotenv
@@ -17,7 +17,7 @@ mood_agent=Agent(
     instruction="""
     You are an agent to guage the mood of different localities from Bengaluru
     You have access to the following tools : 
-    reddit_search, toi_search and google_search
+    lexicon_mood, reddit_search_batch, toi_search_batch, reddit_search and toi_search
     1. Majestic  
     2. MG Road  
     3. Electronic City  
@@ -28,16 +28,27 @@ mood_agent=Agent(
     8. Hebbal  
     9. Silk Board
 
-    For each of these localities, you can use the tools multiple times to guage the mood of the user.
-    Give out a single string output that contains the description of the mood for each of the locality
-    the string output should clearly mention the locality name and  its mood.
-    Ignore the localities, for which you cannot access the mood..
-    You need to definitely try both tools for each of the above cities atleast once
-    and not more than thrice
-    You need to output the mood for all the places. for localities for which you cannot guage the mood
-    output that you cannot guage the mood.. but proceed with guaging the mood for other localities
+    If the message names specific localities, only gauge those.
+    Start with one lexicon_mood call for all the localities. Where it returns
+    needs_llm false, use its mood as is. Use the other tools only for the rest.
+
+    Then call reddit_search_batch and toi_search_batch once each, in the same turn,
+    with the list of all remaining localities. Their results are keyed by locality.
+    Use reddit_search / toi_search only to look again at a single locality whose
+    batch result was empty or unclear, and not more than twice per locality.
+    You need to output the mood for all the places asked for. for localities for which you cannot guage the mood
+    use "unable to gauge".. but proceed with guaging the mood for other localities
+
+    Your final answer must be only a JSON object, with no markdown and no other text.
+    It has two keys:
+    - timestamp: the current time in ISO format
+    - moods: a list with one object per locality, each with the keys
+      - locality: the locality name exactly as listed above
+      - mood: one of "positive", "neutral", "negative", "angry", "unable to gauge"
+      - mood_number: positive 5, neutral 4, negative 3, angry 2, unable to gauge 1
+      - reason: one or two sentences on what people are reporting there
     """,
-    tools=[reddit_search,toi_search]
+    tools=[lexicon_mood,reddit_search_batch,toi_search_batch,reddit_search,toi_search]
 )
 
 root_agent=mood_agent
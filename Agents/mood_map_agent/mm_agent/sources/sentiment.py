@@ -0,0 +1,164 @@
+import math
+import re
+
+# Rule-based mood scoring over locality-tagged posts and articles, so the
+# mood map only needs a model for localities where the signal is unclear.
+# Lexicon weights are tuned for Indian English and Bengaluru civic reporting.
+
+POSITIVE = {
+    "good": 1, "great": 2, "nice": 1, "awesome": 2, "amazing": 2, "superb": 2, "love": 2,
+    "lovely": 2, "beautiful": 2, "happy": 2, "enjoy": 1, "enjoyed": 1, "fun": 1, "best": 1,
+    "clean": 1, "safe": 1, "smooth": 2, "quick": 1, "improved": 2, "improvement": 2,
+    "inaugurated": 1, "opened": 1, "restored": 2, "resolved": 2, "fixed": 1, "celebrate": 2,
+    "celebration": 2, "festival": 1, "fest": 1, "pleasant": 2, "helpful": 1, "thanks": 1,
+    "thank": 1, "kudos": 2, "proud": 2, "peaceful": 2, "calm": 1, "free-flowing": 2,
+    "mast": 1, "sakkath": 2,
+}
+
+NEGATIVE = {
+    "bad": 1, "worse": 2, "worst": 2, "poor": 1, "traffic": 1, "jam": 2, "jammed": 2,
+    "congestion": 2, "congested": 2, "gridlock": 2, "stuck": 2, "slow": 1, "delay": 1,
+    "delayed": 1, "pothole": 2, "potholes": 2, "waterlogging": 2, "waterlogged": 2,
+    "flooded": 2, "flooding": 2, "flood": 2, "garbage": 2, "stink": 2, "stinks": 2,
+    "accident": 2, "crash": 2, "killed": 3, "death": 3, "died": 3, "injured": 2,
+    "theft": 2, "robbery": 2, "robbed": 2, "stabbed": 3, "murder": 3, "arrested": 1,
+    "outage": 2, "powercut": 2, "blackout": 2, "shortage": 2, "unsafe": 2, "dirty": 2,
+    "noisy": 1, "closed": 1, "diversion": 1, "protest": 1, "bandh": 2, "strike": 1,
+    "problem": 1, "issue": 1, "issues": 1, "complaint": 1, "sad": 2, "worried": 1,
+    "expensive": 1, "overpriced": 1, "dangerous": 2, "collapsed": 3, "fell": 1,
+    "uprooted": 2, "encroachment": 1, "harassment": 2, "scam": 2,
+}
+
+ANGER = {
+    "pathetic": 3, "useless": 3, "shameful": 3, "shame": 2, "disgusting": 3, "disgraceful": 3,
+    "ridiculous": 2, "outrage": 3, "outraged": 3, "furious": 3, "angry": 3, "fed": 1,
+    "frustrated": 2, "frustrating": 2, "horrible": 2, "terrible": 2, "nonsense": 2,
+    "loot": 3, "looting": 3, "corrupt": 3, "corruption": 3, "bribe": 3, "hate": 3,
+    "wtf": 3, "bloody": 2, "idiots": 3, "incompetent": 3, "apathy": 2, "negligence": 3,
+}
+
+PHRASES = {
+    "power cut": ("negative", 2), "no water": ("negative", 2),
+    "traffic jam": ("negative", 2), "bumper to bumper": ("negative", 2), "hours stuck": ("negative", 2),
+    "fed up": ("anger", 3), "sick of": ("anger", 3), "enough is enough": ("anger", 3),
+    "good vibes": ("positive", 2), "well done": ("positive", 2), "no traffic": ("positive", 2),
+    "smooth ride": ("positive", 2), "must visit": ("positive", 2),
+}
+
+NEGATORS = {"not", "no", "never", "isn't", "wasn't", "aren't", "don't", "didn't", "nothing", "hardly", "without"}
+INTENSIFIERS = {"very": 1.5, "so": 1.3, "too": 1.3, "extremely": 2, "really": 1.3, "totally": 1.5, "super": 1.5}
+
+# Mood labels and numbers used by BengaluruMood
+MOOD_NUMBERS = {"positive": 5, "neutral": 4, "negative": 3, "angry": 2, "unable to gauge": 1}
+
+_TAG = re.compile(r"<[^>]+>")
+_TOKEN = re.compile(r"[a-z][a-z'\-]*")
+_PHRASE_PATTERNS = [(re.compile(r"\b" + re.escape(p) + r"\b"), kind, w) for p, (kind, w) in PHRASES.items()]
+
+def score_text(text):
+    """Returns {"positive", "negative", "anger"} weights for one piece of text."""
+    text = _TAG.sub(" ", text or "").lower()
+    totals = {"positive": 0.0, "negative": 0.0, "anger": 0.0}
+    for pattern, kind, weight in _PHRASE_PATTERNS:
+        hits = len(pattern.findall(text))
+        if hits:
+            totals[kind] += hits * weight
+            text = pattern.sub(" ", text)
+
+    tokens = _TOKEN.findall(text)
+    for i, token in enumerate(tokens):
+        kind, weight = None, 0
+        if token in ANGER:
+            kind, weight = "anger", ANGER[token]
+        elif token in NEGATIVE:
+            kind, weight = "negative", NEGATIVE[token]
+        elif token in POSITIVE:
+            kind, weight = "positive", POSITIVE[token]
+        if not kind:
+            continue
+        window = tokens[max(0, i - 3):i]
+        for word in window:
+            weight *= INTENSIFIERS.get(word, 1)
+        if any(word in NEGATORS for word in window):
+            # "not good" reads negative, "no traffic" / "not bad" read mildly positive
+            kind = "negative" if kind == "positive" else "positive"
+            weight *= 0.5
+        totals[kind] += weight
+    return totals
+
+def _units(locality, posts, articles):
+    """(text, weight, label) for article and post bodies, plus comments on posts about the locality."""
+    for article in articles:
+        if locality in article.get("localities", [locality]):
+            yield f"{article.get('title', '')}. {article.get('summary', '')}", 1.5, article.get("title", "")
+    for post in posts:
+        if locality not in post.get("localities", [locality]):
+            continue
+        weight = 1 + math.log1p(max(post.get("score") or 0, 0)) / 3
+        yield f"{post.get('title', '')}. {post.get('text') or ''}", weight, post.get("title", "")
+        for comment in post.get("comments", []):
+            yield comment, 0.5, comment
+
+def locality_mood(locality, posts, articles, min_evidence=3, margin=0.25):
+    """
+    Scores one locality from its tagged posts and articles.
+
+    Returns a BengaluruMood-shaped dict plus score, evidence (the strongest
+    snippets) and needs_llm, which is set when there are fewer than
+    min_evidence opinionated snippets or the polarity is within margin of a
+    label boundary.
+    """
+    pos = neg = anger = 0.0
+    scored = []
+    for text, weight, label in _units(locality, posts, articles):
+        s = score_text(text)
+        total = s["positive"] + s["negative"] + s["anger"]
+        if not total:
+            continue
+        pos += weight * s["positive"]
+        neg += weight * s["negative"]
+        anger += weight * s["anger"]
+        scored.append((weight * total, (s["positive"] - s["negative"] - s["anger"]) / total, label))
+
+    mass = pos + neg + anger
+    polarity = (pos - neg - anger) / mass if mass else 0.0
+    anger_share = anger / mass if mass else 0.0
+    scored.sort(key=lambda item: item[0], reverse=True)
+    evidence = [{"text": label[:200], "polarity": round(p, 2)} for _, p, label in scored[:3]]
+
+    if not scored:
+        mood = "unable to gauge"
+    elif polarity <= -margin and anger_share >= 0.35:
+        mood = "angry"
+    elif polarity >= margin:
+        mood = "positive"
+    elif polarity <= -margin:
+        mood = "negative"
+    else:
+        mood = "neutral"
+
+    # Near a boundary or on too little evidence the lexicon is not trusted on its own
+    near_boundary = abs(abs(polarity) - margin) < 0.1 or (mood in ("negative", "angry") and abs(anger_share - 0.35) < 0.1)
+    needs_llm = len(scored) < min_evidence or near_boundary
+
+    if evidence:
+        reason = f"{len(scored)} local reports lean {mood}; strongest: \"{evidence[0]['text'][:120]}\""
+    else:
+        reason = "No recent local reports mention this locality."
+    return {
+        "locality": locality,
+        "mood": mood,
+        "mood_number": MOOD_NUMBERS[mood],
+        "reason": reason,
+        "score": round(polarity, 3),
+        "evidence_count": len(scored),
+        "evidence": evidence,
+        "needs_llm": needs_llm,
+    }
+
+def prefilter(localities, reddit_feed, toi_feed, min_evidence=3):
+    """locality_mood for each locality, reading from the shared cached feeds."""
+    return {
+        locality: locality_mood(locality, reddit_feed.search(locality, limit=10), toi_feed.search(locality), min_evidence)
+        for locality in localities
+    }
@@ -1,74 +1,106 @@
 import os
-import praw
-import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
 from dotenv import load_dotenv
+from .sources.compact import compact_items, to_json
+from .sources.reddit import reddit_feed
+from .sources.sentiment import prefilter
+from .sources.toi import toi_feed
 
 load_dotenv()
 
-reddit = praw.Reddit(
-    client_id=os.getenv("REDDIT_CLIENT_ID"),
-    client_secret=os.getenv("REDDIT_SECRET"),
-    user_agent="city_intel_agent"
-)
+# Prompt budgets per locality, for the single and the batch tools alike
+REDDIT_TOKEN_BUDGET = int(os.getenv("MOOD_REDDIT_TOKEN_BUDGET", "1200"))
+NEWS_TOKEN_BUDGET = int(os.getenv("MOOD_NEWS_TOKEN_BUDGET", "600"))
+BATCH_WORKERS = 9
+
+def _reddit_items(locality):
+    return compact_items(
+        reddit_feed.search(locality, limit=5),
+        REDDIT_TOKEN_BUDGET,
+        text_keys=("title", "text"),
+        list_key="comments",
+        keep_keys=("score", "url", "localities"),
+    )
+
+def _toi_items(locality):
+    return compact_items(
+        toi_feed.search(locality),
+        NEWS_TOKEN_BUDGET,
+        text_keys=("title", "summary"),
+        keep_keys=("link", "published", "localities"),
+    )
+
+def _batch(lookup, localities):
+    """Runs lookup for every locality concurrently; results keyed by locality, errors included."""
+    def safe(locality):
+        try:
+            return lookup(locality)
+        except Exception as e:
+            return {"error": str(e)}
+    localities = list(dict.fromkeys(localities))
+    if not localities:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(BATCH_WORKERS, len(localities))) as pool:
+        return dict(zip(localities, pool.map(safe, localities)))
 
 def reddit_search(locality: str) -> str:
     """
     Searches r/bengaluru for recent posts about the given locality.
-    Returns a JSON string of relevant posts and comments.
+    Returns a compact JSON string of relevant posts and their top comments.
     """
-    subreddit = reddit.subreddit("bengaluru")
-    results = subreddit.search(locality, sort="new", limit=5)
-
-    mood_data = []
-    for post in results:
-        try:
-            post.comments.replace_more(limit=0)
-            comments = [c.body for c in post.comments.list()[:10] if hasattr(c, "body")]
-        except Exception:
-            comments = []
-
-        mood_data.append({
-            "title": post.title,
-            "text": post.selftext,
-            "comments": comments,
-            "score": post.score,
-            "url": post.url
-        })
-
-    return json.dumps(mood_data, indent=2)
-
-import feedparser
-import json
+    return to_json(_reddit_items(locality))
 
 def toi_search(locality: str) -> str:
     """
     Searches TOI Bangalore RSS feed for articles mentioning the given locality.
-    Returns a JSON string of matching articles.
-    
+    Returns a compact JSON string of matching articles.
+
+    The feed is fetched once per TTL and indexed by locality and its aliases,
+    so repeated calls for different localities don't re-download it.
+
     Args:
         locality (str): e.g., "BTM Layout", "Majestic", etc.
 
     Returns:
         str: JSON string of article summaries
     """
-    rss_url = "https://timesofindia.indiatimes.com/rssfeeds/-2128833038.cms"
-    feed = feedparser.parse(rss_url)
+    return to_json(_toi_items(locality))
 
-    articles = []
-    for entry in feed.entries:
-        title = entry.title.lower()
-        summary = entry.get("summary", "").lower()
-        combined = f"{title} {summary}"
+def lexicon_mood(localities: List[str]) -> str:
+    """
+    Scores the mood of each locality locally from the cached Reddit posts and
+    TOI articles that mention it, using a sentiment lexicon.
 
-        if locality.lower() in combined:
-            articles.append({
-                "title": entry.title,
-                "summary": entry.get("summary", ""),
-                "link": entry.link,
-                "published": entry.get("published", ""),
-                "source": "timesofindia"
-            })
+    Args:
+        localities (List[str]): e.g., ["Majestic", "Silk Board"]
 
-    return json.dumps(articles, indent=2)
+    Returns:
+        str: JSON keyed by locality with mood, mood_number, reason, evidence and
+        needs_llm (true when the evidence is thin or mixed)
+    """
+    return to_json(prefilter(localities, reddit_feed, toi_feed))
+
+def reddit_search_batch(localities: List[str]) -> str:
+    """
+    reddit_search for several localities in one call, run concurrently.
 
+    Args:
+        localities (List[str]): e.g., ["Majestic", "Silk Board"]
+
+    Returns:
+        str: JSON object keyed by locality, each a list of posts with their top comments
+    """
+    return to_json(_batch(_reddit_items, localities))
 
+def toi_search_batch(localities: List[str]) -> str:
+    """
+    toi_search for several localities in one call, run concurrently.
+
+    Args:
+        localities (List[str]): e.g., ["Majestic", "Silk Board"]
+
+    Returns:
+        str: JSON object keyed by locality, each a list of article summaries
+    """
+    return to_json(_batch(_toi_items, localities))
@@ -0,0 +1,116 @@
+# bench_fetch.py
+#
+# Measures fetch_data latency against the Firestore emulator: the old serial,
+# unprojected collection streams vs the concurrent get_all + field-mask reads,
+# cold and from the in-process cache.
+#
+#   gcloud emulators firestore start --host-port=localhost:8080
+#   FIRESTORE_EMULATOR_HOST=localhost:8080 python bench_fetch.py --seed --runs 20
+
+import argparse
+import os
+import random
+import statistics
+import time
+
+if not os.getenv("FIRESTORE_EMULATOR_HOST"):
+    raise SystemExit("❌ Set FIRESTORE_EMULATOR_HOST; this benchmark writes synthetic data.")
+
+from pred_agent import tools
+from pred_agent.digest import FIXED_POINTS, estimate_tokens, to_json
+
+GENERATION = "20250801_100000"
+
+def seed(events, stale_events, rng=random.Random(7)):
+    db = tools.db
+    points = list(FIXED_POINTS)
+    routes = []
+    for a in points:
+        for b in points:
+            if a != b:
+                static = rng.randint(900, 3600)
+                factor = rng.choice([1.0, 1.1, 1.3, 1.6, 2.0])
+                routes.append({
+                    "source": a, "destination": b, "status": "success",
+                    "distance_meters": rng.randint(4000, 30000),
+                    "duration_seconds": int(static * factor), "static_duration_seconds": static,
+                    "congestion_factor": factor,
+                })
+    db.collection("current_traffic_data").document("latest").set(
+        {"timestamp": GENERATION, "city": "Bengaluru", "api_provider": "Maps_Routes_REST", "routes": routes})
+    db.collection("current_weather_data").document("bengaluru_latest_weather").set({
+        "timestamp": GENERATION, "city": "Bengaluru", "source": "OpenWeatherMap",
+        "locations": [{
+            "name": p, "lat": 12.9, "lon": 77.6, "retrieval_status": "success",
+            "weather": {"main": rng.choice(["Clouds", "Rain"]), "description": "light rain", "icon": "10d"},
+            "temperature": {"actual": 24.1, "feels_like": 24.8, "humidity": 82},
+            "wind": {"speed": 4.1, "gust": 7.2}, "cloud_coverage": 90,
+            "sunrise": 1722472200, "sunset": 1722517800,
+        } for p in points]})
+    db.collection("current_airquality_data").document("bengaluru_latest_aqi").set({
+        "timestamp": GENERATION, "city": "Bengaluru", "source": "OpenWeatherMap",
+        "locations": [{
+            "name": p, "lat": 12.9, "lon": 77.6, "aqi": rng.randint(1, 5), "aqi_category": "Fair",
+            "components": {"co": 300.4, "no": 0.1, "no2": 12.3, "o3": 40.2, "so2": 5.1,
+                           "pm2_5": 31.2, "pm10": 50.3, "nh3": 1.2},
+        } for p in points]})
+
+    def event(i, generation):
+        place = rng.choice(points).replace("_", " ")
+        return {
+            "location": place, "locality": place, "localities": [place], "event_type": "traffic",
+            "timestamp": GENERATION, "description": f"Event {i} near {place}. " + "detail " * 40,
+            "first_seen": GENERATION, "last_seen": GENERATION, "seen_count": 1,
+            "event_id": f"{generation}_{i:03d}", "generation": generation,
+        }
+    batch = db.batch()
+    for i in range(events):
+        batch.set(db.collection("current_events_data").document(f"{GENERATION}_{i:03d}"), event(i, GENERATION))
+    for i in range(stale_events):
+        batch.set(db.collection("current_events_data").document(f"old_{i:03d}"), event(i, "old"))
+    batch.commit()
+    db.collection("pipeline_state").document("current_events").set(
+        {"generation": GENERATION, "count": events, "timestamp": GENERATION})
+    print(f"🌱 Seeded 3 current_* documents, {events} events and {stale_events} stale events")
+
+def serial_unprojected():
+    """fetch_data's reads before field masks, get_all and the cache."""
+    result = {}
+    for col in ("current_weather_data", "current_airquality_data", "current_traffic_data"):
+        result[col] = [doc.to_dict() for doc in tools.db.collection(col).stream()]
+    result["current_events_data"] = tools.current_events()
+    return result
+
+def cold():
+    tools._cache["data"] = None
+    return tools.read_collections()
+
+def time_runs(label, fn, runs):
+    samples, result = [], None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    p95 = sorted(samples)[max(0, int(len(samples) * 0.95) - 1)]
+    print(f"⏱️ {label:>22}: median {statistics.median(samples):7.1f}ms  p95 {p95:7.1f}ms"
+          f"  ~{estimate_tokens(to_json(result))} tokens read")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", action="store_true", help="write synthetic data first")
+    parser.add_argument("--events", type=int, default=40)
+    parser.add_argument("--stale-events", type=int, default=40)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.seed:
+        seed(args.events, args.stale_events)
+    cold()  # warm up the client's channel
+
+    time_runs("serial, unprojected", serial_unprojected, args.runs)
+    time_runs("concurrent, projected", cold, args.runs)
+    time_runs("cached", tools.read_collections, args.runs)
+    time_runs("fetch_data (cached)", tools.fetch_data, args.runs)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+# Source ingestion shared by the agent tools.
+# Modules present in more than one of mood_map_agent/mm_agent/sources,
+# media_agent/sources, predictive_event_analyzer_agent/pred_agent/sources and
+# the CloudFunctions/*/sources directories are identical copies, because each
+# package is deployed on its own.
@@ -1,34 +1,106 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from google.cloud import firestore
 from typing import Dict, Any
 
+from .digest import build_digest, estimate_tokens, to_json
+
 db = firestore.Client("cityinsightmaps")
 
+# The current_* collections each hold one fixed document, overwritten by their handler
+LATEST_DOCS = {
+    "current_weather_data": "bengaluru_latest_weather",
+    "current_airquality_data": "bengaluru_latest_aqi",
+    "current_traffic_data": "latest",
+}
+# Field masks: only what digest.py uses. Firestore can't project inside the
+# locations/routes arrays, so those are read whole.
+DOC_FIELDS = ["timestamp", "locations", "routes"]
+EVENT_FIELDS = ["description", "event_type", "locality", "localities", "location", "seen_count"]
+CACHE_TTL_SECONDS = float(os.getenv("PRED_CACHE_TTL_SECONDS", "60"))
 
-def fetch_data() -> Dict[str, Any]:
+_cache = {"at": 0.0, "data": None}
+_cache_lock = threading.Lock()
+
+def current_events(field_paths=None):
+    """
+    Events of the generation pipeline_state/current_events points at, so a
+    publish in progress is never read half-written. Falls back to the whole
+    collection when there is no pointer yet.
+    """
+    pointer = db.collection("pipeline_state").document("current_events").get()
+    generation = pointer.to_dict().get("generation") if pointer.exists else None
+    query = db.collection("current_events_data")
+    if generation:
+        query = query.where("generation", "==", generation)
+    if field_paths:
+        query = query.select(field_paths)
+    return [doc.to_dict() for doc in query.stream()]
+
+def latest_documents(field_paths=None):
+    """
+    The fixed documents of the current_* collections in one get_all call.
+    A collection whose fixed document is missing is streamed instead.
+    """
+    refs = [db.collection(col).document(doc_id) for col, doc_id in LATEST_DOCS.items()]
+    result = {}
+    for snap in db.get_all(refs, field_paths=field_paths):
+        if snap.exists:
+            result[snap.reference.parent.id] = [snap.to_dict()]
+    for col in LATEST_DOCS:
+        if col not in result:
+            query = db.collection(col).select(field_paths) if field_paths else db.collection(col)
+            result[col] = [doc.to_dict() for doc in query.stream()]
+    return result
+
+def read_collections() -> Dict[str, Any]:
     """
-    Fetches the latest documents from Firestore collections:
+    Reads the latest documents from Firestore collections:
     - current_weather_data
     - current_airquality_data
     - current_traffic_data
-    - current_events_data
+    - current_events_data (active generation only)
+
+    The fixed documents and the events are read concurrently, with field masks.
+    Results are reused for CACHE_TTL_SECONDS, so repeated tool calls within a
+    session don't go back to Firestore.
 
     Returns:
         A dictionary with collection names as keys and a list of document dicts as values.
     """
-    collections = [
-        "current_weather_data",
-        "current_airquality_data",
-        "current_traffic_data",
-        "current_events_data"
-    ]
-    
-    result = {}
-    for col in collections:
-        docs = db.collection(col).stream()
-        result[col] = [doc.to_dict() for doc in docs]
-    
+    with _cache_lock:
+        if _cache["data"] is not None and time.monotonic() - _cache["at"] < CACHE_TTL_SECONDS:
+            return _cache["data"]
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        docs = pool.submit(latest_documents, DOC_FIELDS)
+        events = pool.submit(current_events, EVENT_FIELDS)
+        result = {**docs.result(), "current_events_data": events.result()}
+
+    with _cache_lock:
+        _cache["at"], _cache["data"] = time.monotonic(), result
     return result
 
+def fetch_data() -> Dict[str, Any]:
+    """
+    Fetches a compact digest of the current city situation for the user:
+    - weather: the most common condition and median temperature
+    - rain: places where it is raining
+    - user_corridors: congestion between the user's own places
+    - congested_corridors: the worst congested routes elsewhere
+    - city_aqi / aqi_outliers: median AQI (1 good - 5 very poor) and places worse than it
+    - events: current events, those near the user's places and new ones first
+
+    Returns:
+        A dictionary with the digest sections, trimmed to a fixed token budget.
+    """
+    data = read_collections()
+    digest = build_digest(data, fetch_user()["description"])
+    print(f"🗜️ Digest {estimate_tokens(to_json(digest))} tokens")
+    return digest
+
 
 def fetch_user() -> Dict[str, str]:
     """
@@ -15,12 +15,12 @@ FIRESTORE_SCHEMA: Dict[str, List[str]] = {
     "commentary": ["text", "timestamp"],
     "cultural_political_events": ["description", "endTime", "imageUrl", "location", "name", "startTime", "timestamp", "type", "userId", "videoUrl"],
     "current_airquality_data": ["city", "locations", "source", "timestamp"],
-    "current_events_data": ["description", "event_type", "location", "timestamp"],
+    "current_events_data": ["description", "event_id", "event_type", "first_seen", "generation", "last_seen", "locality", "localities", "location", "seen_count", "timestamp"],
     "current_pred_data": ["data", "timestamp"],
     "current_traffic_data": ["api_provider", "city", "routes", "timestamp"],
     "current_user_data": ["Name", "description", "imageUrl", "location", "timestamp", "type", "userId"],
     "current_weather_data": ["city", "locations", "source", "timestamp"],
-    "events_data": ["description", "event_type", "location", "timestamp"],
+    "events_data": ["description", "event_id", "event_type", "first_seen", "last_seen", "locality", "localities", "location", "seen_count", "timestamp"],
     "power_cut_data": ["area", "estimatedEndTime", "location", "reason", "startTime"],
     "raw_airquality_data": ["aqi", "aqi_category", "city", "components", "lat", "lon", "source", "timestamp"],
     "raw_events_data": ["description", "timestamp"],
@@ -0,0 +1,89 @@
+# bench_executor.py
+#
+# Compares remote (Agent Engine) and local (in-process AdkApp) execution of
+# dte_agent on recorded inputs: the prose stored in raw_events_data by earlier
+# runs. dte_agent only turns text into events, so replaying it has no side
+# effects; the media agent advances the source checkpoints and is left out.
+# Local mode needs dte_agent importable (e.g. PYTHONPATH=../../Agents/description_to_event_agent).
+#
+#   python bench_executor.py --record workload.json --limit 10
+#   python bench_executor.py --replay workload.json --modes remote,local --repeat 2
+
+import argparse
+import json
+import statistics
+import time
+
+import vertexai
+from google.cloud import firestore
+
+from main import AGENT_2_ID, AGENT_2_MODULE, LOCATION, PROJECT_ID
+from sources.executor import get_executor
+
+def record(path, limit):
+    db = firestore.Client()
+    docs = (db.collection("raw_events_data")
+            .order_by("timestamp", direction=firestore.Query.DESCENDING)
+            .limit(limit).stream())
+    workload = [
+        {"message": f"{d['timestamp']}\n{d['raw_description']}"}
+        for d in (doc.to_dict() for doc in docs) if d.get("raw_description")
+    ]
+    with open(path, "w") as f:
+        json.dump(workload, f, indent=2, ensure_ascii=False)
+    print(f"✅ Recorded {len(workload)} dte_agent inputs to {path}")
+
+def run_once(executor, message):
+    """Returns (seconds to first event, total seconds, text chars)."""
+    started = time.perf_counter()
+    first, chars = None, 0
+    session_id = executor.create_session("bench_executor")
+    for event in executor.stream_query("bench_executor", session_id, message):
+        if first is None:
+            first = time.perf_counter() - started
+        chars += sum(len(p.get("text", "")) for p in event.get("content", {}).get("parts", []))
+    total = time.perf_counter() - started
+    return (first if first is not None else total), total, chars
+
+def _p95(samples):
+    return sorted(samples)[max(0, int(len(samples) * 0.95) - 1)]
+
+def bench(mode, workload, repeat):
+    started = time.perf_counter()
+    executor = get_executor(AGENT_2_ID, AGENT_2_MODULE, mode)
+    setup = time.perf_counter() - started
+
+    firsts, totals = [], []
+    for _ in range(repeat):
+        for item in workload:
+            first, total, _ = run_once(executor, item["message"])
+            firsts.append(first)
+            totals.append(total)
+    print(f"⏱️ {mode:>6}: setup {setup:5.2f}s | first event median {statistics.median(firsts):5.2f}s "
+          f"p95 {_p95(firsts):5.2f}s | total median {statistics.median(totals):5.2f}s p95 {_p95(totals):5.2f}s "
+          f"| {len(totals)} calls")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--record")
+    parser.add_argument("--replay")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--modes", default="remote,local")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    vertexai.init(project=PROJECT_ID, location=LOCATION)
+    if args.record:
+        record(args.record, args.limit)
+        return
+    if not args.replay:
+        parser.error("--record or --replay is required")
+
+    with open(args.replay) as f:
+        workload = json.load(f)
+    print(f"📊 {len(workload)} recorded inputs x {args.repeat}")
+    for mode in args.modes.split(","):
+        bench(mode.strip(), workload, args.repeat)
+
+if __name__ == "__main__":
+    main()
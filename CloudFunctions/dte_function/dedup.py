@@ -0,0 +1,105 @@
+import hashlib
+import os
+import random
+import re
+
+# Cross-run event dedup. Events are bucketed by normalised (locality, event_type);
+# within a bucket, a MinHash of the description's stemmed content words decides
+# whether an event is one already seen inside the time window. Word order and
+# bigrams are left out on purpose: the agents reword the same story from run to
+# run, and a bucket already pins the place and type. Buckets live in event_dedup, one document
+# each, so a run reads all it needs with a single get_all.
+
+INDEX_COLLECTION = "event_dedup"
+WINDOW_SECONDS = int(os.getenv("DEDUP_WINDOW_HOURS", "24")) * 3600
+# Reworded repeats score about 0.7 and up, distinct events in one bucket 0.35
+# and below (test_dedup.py pins both)
+SIMILARITY_THRESHOLD = float(os.getenv("DEDUP_SIMILARITY", "0.5"))
+NUM_PERM = 64
+
+_MERSENNE = (1 << 61) - 1
+_rng = random.Random(20240801)
+_PERMS = [(_rng.randrange(1, _MERSENNE), _rng.randrange(0, _MERSENNE)) for _ in range(NUM_PERM)]
+_STOPWORDS = {"a", "an", "the", "in", "at", "on", "of", "to", "for", "and", "or", "is", "are", "was",
+              "were", "be", "by", "with", "near", "from", "as", "has", "have", "its", "it", "this", "that",
+              "will", "there", "due", "over", "across", "after", "report", "reports", "reported",
+              "expected", "likely", "sees",
+              "city", "bengaluru", "bangalore"}
+_SUFFIXES = ("ing", "ed", "es", "s")
+
+def _stem(word):
+    """Drops one inflection suffix, so "reported" / "reports" and "blocks" / "blocking" meet."""
+    for suffix in _SUFFIXES:
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+def _features(text):
+    return {_stem(w) for w in re.findall(r"[a-z0-9]+", (text or "").lower()) if w not in _STOPWORDS}
+
+def minhash(text):
+    hashes = [int.from_bytes(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest(), "big")
+              for f in _features(text)]
+    if not hashes:
+        return [0] * NUM_PERM
+    return [min((a * h + b) % _MERSENNE for h in hashes) & 0xFFFFFFFF for a, b in _PERMS]
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two MinHash signatures (0 for signatures of another size)."""
+    if len(sig_a) != len(sig_b):
+        return 0.0
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / NUM_PERM
+
+def dedup_key(event):
+    place = event.get("locality") or event.get("location") or ""
+    place = " ".join(re.findall(r"[a-z0-9]+", place.lower()))
+    return f"{place}|{event.get('event_type', 'others')}"
+
+def bucket_id(key):
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+
+def assign_event_ids(db, events, generation, now_epoch, timestamp_str):
+    """
+    Matches events against the dedup index.
+
+    Returns (assigned, buckets). assigned is a list of (event_id, event_doc, is_new)
+    in input order, where event_doc carries first_seen / last_seen / seen_count.
+    A repeat keeps the event_id it was first stored under. buckets is
+    {bucket_id: entries} to be written back to INDEX_COLLECTION.
+    """
+    keys = [dedup_key(e) for e in events]
+    ids = {bucket_id(k) for k in keys}
+    buckets = {bid: [] for bid in ids}
+    if ids:
+        refs = [db.collection(INDEX_COLLECTION).document(bid) for bid in ids]
+        for snap in db.get_all(refs):
+            if snap.exists:
+                buckets[snap.id] = [
+                    e for e in (snap.to_dict() or {}).get("entries", [])
+                    if now_epoch - e.get("last_seen_epoch", 0) <= WINDOW_SECONDS
+                ]
+
+    assigned = []
+    for idx, (event, key) in enumerate(zip(events, keys)):
+        entries = buckets[bucket_id(key)]
+        signature = minhash(event.get("description", ""))
+        match = max(entries, key=lambda e: similarity(signature, e["minhash"]), default=None)
+        if match and similarity(signature, match["minhash"]) >= SIMILARITY_THRESHOLD:
+            match["last_seen_epoch"] = now_epoch
+            match["last_seen"] = timestamp_str
+            match["seen_count"] += 1
+            doc = {**event, "first_seen": match["first_seen"], "last_seen": timestamp_str, "seen_count": match["seen_count"]}
+            assigned.append((match["event_id"], doc, False))
+        else:
+            event_id = f"{generation}_{idx+1:03d}"
+            entries.append({
+                "event_id": event_id,
+                "minhash": signature,
+                "first_seen": timestamp_str,
+                "last_seen": timestamp_str,
+                "last_seen_epoch": now_epoch,
+                "seen_count": 1,
+            })
+            doc = {**event, "first_seen": timestamp_str, "last_seen": timestamp_str, "seen_count": 1}
+            assigned.append((event_id, doc, True))
+    return assigned, buckets
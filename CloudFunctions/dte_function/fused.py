@@ -0,0 +1,100 @@
+import json
+import os
+
+from vertexai.generative_models import GenerationConfig, GenerativeModel
+
+from sources.compact import compact_items, to_json
+from sources.gazetteer import tag_localities
+
+# Fused mode: new source items go straight to the BengaluruEvent list in one
+# structured-output call, instead of media agent prose -> dte_agent JSON.
+
+FUSED_MODEL = os.getenv("DTE_FUSED_MODEL", "gemini-2.5-flash")
+FUSED_TOKEN_BUDGET = int(os.getenv("DTE_FUSED_TOKEN_BUDGET", "4000"))
+
+EVENT_TYPES = ["others", "political", "cultural", "powercut", "traffic", "weather", "criminal", "civil"]
+
+# Same fields as dte_agent's BengaluruEvent
+EVENT_LIST_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "location": {"type": "STRING", "description": "Specific location of the event in Bengaluru."},
+            "event_type": {"type": "STRING", "enum": EVENT_TYPES},
+            "timestamp": {"type": "STRING", "description": "Timestamp of the event."},
+            "description": {"type": "STRING", "description": "A one-line description of the event."},
+        },
+        "required": ["location", "event_type", "timestamp", "description"],
+    },
+}
+
+PROMPT = """You extract events in Bengaluru from news articles and r/bengaluru posts.
+The items below are new since the last run, as JSON. Each has a "localities"
+list with the Bengaluru localities it names.
+
+* look for events that can be directly associated with a location in bengaluru *
+* use the most specific location the item gives; prefer the names in "localities" *
+* classify each event as one of [others,political,cultural,powercut,traffic,weather,criminal,civil] *
+* write a one line description of each event *
+* use {timestamp} as the timestamp *
+* merge items that describe the same event into one *
+* if no item describes an event tied to a location, return an empty list *
+
+Items:
+{items}
+"""
+
+_model = None
+
+def _get_model():
+    global _model
+    if _model is None:
+        _model = GenerativeModel(FUSED_MODEL)
+    return _model
+
+def compact_records(records):
+    """Compacted like the media agent tools' items, with Reddit's top comments."""
+    tagged = [
+        {**r, "localities": tag_localities(" ".join([r.get("title", ""), r.get("text") or "", *r.get("comments", [])]))}
+        for r in records
+    ]
+    return compact_items(
+        tagged,
+        FUSED_TOKEN_BUDGET,
+        text_keys=("title", "text"),
+        list_key="comments",
+        keep_keys=("source", "localities"),
+    )
+
+def clean_events(events, timestamp_str):
+    """Drops malformed entries and coerces the rest to BengaluruEvent fields."""
+    cleaned = []
+    for event in events if isinstance(events, list) else []:
+        if not isinstance(event, dict) or not event.get("location") or not event.get("description"):
+            continue
+        event_type = str(event.get("event_type", "")).strip().lower().replace(" ", "")
+        cleaned.append({
+            "location": str(event["location"]).strip(),
+            "event_type": event_type if event_type in EVENT_TYPES else "others",
+            "timestamp": event.get("timestamp") or timestamp_str,
+            "description": " ".join(str(event["description"]).split()),
+        })
+    return cleaned
+
+def extract_events(records, timestamp_str):
+    """One structured-output call from source items to a list of BengaluruEvent dicts."""
+    prompt = PROMPT.replace("{timestamp}", timestamp_str).replace("{items}", to_json(compact_records(records)))
+    response = _get_model().generate_content(
+        prompt,
+        generation_config=GenerationConfig(
+            response_mime_type="application/json",
+            response_schema=EVENT_LIST_SCHEMA,
+            temperature=0,
+        ),
+    )
+    return clean_events(json.loads(response.text), timestamp_str)
+
+def describe_events(events):
+    """Prose summary of the events for raw_events_data, built without a model call."""
+    return "\n".join(f"{e['location']} ({e['event_type']}): {e['description']}" for e in events)
@@ -1,16 +1,109 @@
+import importlib
 import json
+import os
 from datetime import datetime, timedelta, timezone
 from google.cloud import firestore
 import vertexai
-from vertexai import agent_engines
 import pytz
+from source_gate import CONSUMER, commit_processed, gate_new_items, latest_records, peek_new_records
+from fused import describe_events, extract_events
+from publish import publish_events
+from sources.checkpoint import pending_from_state
+from sources.executor import EXECUTOR_MODE, get_executor, run_session, stream_parts
+from sources.gazetteer import tag_localities
+from sources.reddit import reddit_feed
+from sources.toi import toi_feed
 
 # Config
 PROJECT_ID = "cityinsightmaps"
 LOCATION = "us-central1"
 AGENT_1_ID = "projects/1092037303200/locations/us-central1/reasoningEngines/8559187848840871936"
 AGENT_2_ID = "projects/1092037303200/locations/us-central1/reasoningEngines/6597659104888487936"
+# Packages holding the same root_agents, for AGENT_EXECUTOR=local
+AGENT_1_MODULE = "media_agent.agent"
+AGENT_2_MODULE = "dte_agent.agent"
 IST = timezone(timedelta(hours=5, minutes=30))
+NO_NEW_ITEMS = "NO_NEW_ITEMS"
+# "agents": media agent -> dte_agent. "fused": one structured call from the source items.
+DTE_MODE = os.getenv("DTE_MODE", "agents")
+GC_WAIT_SECONDS = 30
+
+def tag_event_localities(event):
+    """
+    Adds the gazetteer localities named in the event's location and description.
+    `locality` is the canonical name for the location; `location` is left as the agent wrote it.
+    """
+    from_location = tag_localities(event.get("location", ""))
+    mentioned = list(dict.fromkeys(from_location + tag_localities(event.get("description", ""))))
+    event["localities"] = mentioned
+    if mentioned:
+        event["locality"] = (from_location or mentioned)[0]
+    return event
+
+def source_feeds(mode, executor_mode):
+    """
+    The RedditFeed and FeedCache for the change gate. When the media agent runs
+    in this process, its tools use media_agent.sources, its own copy of these
+    modules; gating with those instances lets the agent reuse the listings
+    already fetched instead of fetching both sources again.
+    """
+    if mode != "fused" and executor_mode == "local":
+        package = AGENT_1_MODULE.rsplit(".", 1)[0]
+        return (importlib.import_module(f"{package}.sources.reddit").reddit_feed,
+                importlib.import_module(f"{package}.sources.toi").toi_feed)
+    return reddit_feed, toi_feed
+
+def run_agent_chain(timestamp_str, executor_mode=None):
+    """
+    media agent -> prose, then dte_agent -> events. Returns (fused_text,
+    events, pending): pending are the media agent's source checkpoint records,
+    to be committed once the events are stored.
+    """
+    # ---------------------------
+    # 1. Run Agent 1: Get Raw Text
+    # ---------------------------
+    agent1 = get_executor(AGENT_1_ID, AGENT_1_MODULE, executor_mode)
+    fused_text, agent1_state = run_session(agent1, "agent1_trigger", "summarize me",
+                                           {"consumer": CONSUMER})
+    pending = pending_from_state(agent1_state)
+
+    # Media tools only return unseen items; nothing new means nothing to extract
+    if fused_text == NO_NEW_ITEMS:
+        return NO_NEW_ITEMS, [], pending
+
+    # ---------------------------
+    # 2. Run Agent 2: Get JSON Events
+    # ---------------------------
+    combined_input = f"{timestamp_str}\n{fused_text}"
+    agent2 = get_executor(AGENT_2_ID, AGENT_2_MODULE, executor_mode)
+
+    structured_events = []
+    for part in stream_parts(agent2, "agent2_trigger", combined_input):
+        if "text" in part:
+            try:
+                parsed = json.loads(part["text"])
+                if isinstance(parsed, list):
+                    structured_events.extend(parsed)
+            except Exception as e:
+                print("❌ JSON parse error from agent 2:", e)
+
+    return fused_text, structured_events, pending
+
+def run_fused(source_state, timestamp_str, force=False, feeds=None):
+    """
+    New source items -> events in one structured call; the prose is derived
+    from the events. Returns (text, events, pending) like run_agent_chain.
+    """
+    if source_state is None:
+        records, pending = peek_new_records(feeds=feeds)
+    else:
+        records, pending = source_state["new_records"], source_state["pending"]
+    if force and not records:
+        records = latest_records(feeds)
+    if not records:
+        return NO_NEW_ITEMS, [], pending
+    events = extract_events(records, timestamp_str)
+    return describe_events(events), events, pending
 
 def main(request):
     # Init VertexAI and Firestore
@@ -18,64 +111,55 @@ def main(request):
     db = firestore.Client()
 
     # ---------------------------
-    # 1. Run Agent 1: Get Raw Text
+    # 0. Skip the agent chain when too few new items arrived
     # ---------------------------
-    agent1 = agent_engines.get(AGENT_1_ID)
-    session1 = agent1.create_session(user_id="agent1_trigger")
-    session_id1 = session1["id"]
-
-    fused_text = ""
-    for event in agent1.stream_query(user_id="agent1_trigger", session_id=session_id1, message="summarize me"):
-        parts = event.get("content", {}).get("parts", [])
-        for part in parts:
-            if "text" in part:
-                fused_text += part["text"].strip() + "\n"
+    args = request.args if request is not None else {}
+    force = args.get("force", "").lower() == "true"
+    mode = args.get("mode", DTE_MODE).lower()
+    executor_mode = args.get("executor", EXECUTOR_MODE).lower()
+    feeds = source_feeds(mode, executor_mode)
+    run, source_state = gate_new_items(feeds)
+    if not run and not force:
+        return {"status": "skipped", "reason": "too few new items since the last processed run"}, 200
 
     now_ist = datetime.now(IST)
     timestamp_str = now_ist.isoformat()
     doc_name = f"event_{now_ist.strftime('%Y%m%d_%H%M%S')}"
 
+    if mode == "fused":
+        fused_text, structured_events, pending = run_fused(source_state, timestamp_str, force, feeds)
+    else:
+        fused_text, structured_events, pending = run_agent_chain(timestamp_str, executor_mode)
+
+    if fused_text == NO_NEW_ITEMS:
+        commit_processed(pending)
+        return {"status": "skipped", "reason": "no new news or posts"}, 200
+
+    structured_events = [tag_event_localities(e) for e in structured_events if isinstance(e, dict)]
+
     # Write to raw_events_data
     db.collection("raw_events_data").document(doc_name).set({
         "timestamp": timestamp_str,
-        "raw_description": fused_text.strip()
+        "raw_description": fused_text
     })
 
     # ---------------------------
-    # 2. Run Agent 2: Get JSON Events
-    # ---------------------------
-    combined_input = f"{timestamp_str}\n{fused_text.strip()}"
-    agent2 = agent_engines.get(AGENT_2_ID)
-    session2 = agent2.create_session(user_id="agent2_trigger")
-    session_id2 = session2["id"]
-
-    structured_events = []
-    for response in agent2.stream_query(user_id="agent2_trigger", session_id=session_id2, message=combined_input):
-        content = response.get("content", {})
-        for part in content.get("parts", []):
-            if "text" in part:
-                try:
-                    parsed = json.loads(part["text"])
-                    if isinstance(parsed, list):
-                        structured_events.extend(parsed)
-                except Exception as e:
-                    print("❌ JSON parse error from agent 2:", e)
-
-    # ---------------------------
-    # 3. Write to events_data and current_events_data
+    # 3. Publish to events_data and a new current_events_data generation
     # ---------------------------
-    # Clear current_events_data
-    for doc in db.collection("current_events_data").stream():
-        doc.reference.delete()
+    publish_stats, gc = publish_events(db, doc_name, structured_events, timestamp_str)
 
-    # Store all events
-    for idx, event_data in enumerate(structured_events):
-        event_id = f"{doc_name}_{idx+1:03d}"
-        db.collection("events_data").document(event_id).set(event_data)
-        db.collection("current_events_data").document(event_id).set(event_data)
+    # Only now are the items processed; a failure above leaves them for the next run
+    commit_processed(pending)
+    # Old generations are removed while the state is recorded; the function
+    # instance may be frozen after returning, so don't leave it running
+    gc.join(timeout=GC_WAIT_SECONDS)
 
     return {
         "status": "success",
-        "raw_description": fused_text.strip(),
-        "structured_count": len(structured_events)
+        "generation": doc_name,
+        "mode": mode,
+        **({"executor": executor_mode} if mode != "fused" else {}),
+        "raw_description": fused_text,
+        "structured_count": len(structured_events),
+        **publish_stats
     }, 200
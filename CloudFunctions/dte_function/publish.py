@@ -0,0 +1,80 @@
+import threading
+import time
+
+from dedup import INDEX_COLLECTION, assign_event_ids
+
+# Generation-based publish for current_events_data. Each run writes its events
+# tagged with a new generation id, then flips one pointer document. Readers that
+# follow the pointer never see a half-written set. Older generations are
+# deleted afterwards.
+
+EVENTS_COLLECTION = "events_data"
+CURRENT_COLLECTION = "current_events_data"
+POINTER_COLLECTION = "pipeline_state"
+POINTER_DOC_ID = "current_events"
+BATCH_SIZE = 500  # Firestore's limit on writes per batch
+
+def commit_in_batches(db, operations):
+    """operations: (method, ref, data) tuples, committed in batches of BATCH_SIZE."""
+    for start in range(0, len(operations), BATCH_SIZE):
+        batch = db.batch()
+        for method, ref, data in operations[start:start + BATCH_SIZE]:
+            if method == "set":
+                batch.set(ref, data)
+            else:
+                batch.delete(ref)
+        batch.commit()
+
+def active_generation(db):
+    doc = db.collection(POINTER_COLLECTION).document(POINTER_DOC_ID).get()
+    return doc.to_dict().get("generation") if doc.exists else None
+
+def collect_garbage(db, generation):
+    """Deletes current_events_data documents from any other generation, including untagged ones."""
+    stale = [
+        ("delete", doc.reference, None)
+        for doc in db.collection(CURRENT_COLLECTION).select(["generation"]).stream()
+        if (doc.to_dict() or {}).get("generation") != generation
+    ]
+    commit_in_batches(db, stale)
+    print(f"🧹 Removed {len(stale)} events from older generations")
+    return len(stale)
+
+def publish_events(db, generation, events, timestamp_str):
+    """
+    Writes events to events_data and, tagged with `generation`, to
+    current_events_data in batched commits, then points
+    pipeline_state/current_events at the new generation.
+    Events already seen within the dedup window update their existing
+    events_data document instead of adding a new one.
+    Returns (stats, gc_thread); the caller can wait for the thread.
+    """
+    assigned, buckets = assign_event_ids(db, events, generation, time.time(), timestamp_str)
+
+    # The same event twice in one run: one events_data write with the final count,
+    # and one current_events_data entry
+    latest, current = {}, {}
+    for idx, (event_id, event_doc, _) in enumerate(assigned):
+        latest[event_id] = event_doc
+        current.setdefault(event_id, f"{generation}_{idx+1:03d}")
+
+    operations = []
+    for event_id, event_doc in latest.items():
+        event_doc = {**event_doc, "event_id": event_id}
+        operations.append(("set", db.collection(EVENTS_COLLECTION).document(event_id), event_doc))
+        operations.append(("set", db.collection(CURRENT_COLLECTION).document(current[event_id]),
+                           {**event_doc, "generation": generation}))
+    for bid, entries in buckets.items():
+        operations.append(("set", db.collection(INDEX_COLLECTION).document(bid), {"entries": entries}))
+    commit_in_batches(db, operations)
+
+    db.collection(POINTER_COLLECTION).document(POINTER_DOC_ID).set({
+        "generation": generation,
+        "count": len(latest),
+        "timestamp": timestamp_str,
+    })
+
+    gc = threading.Thread(target=collect_garbage, args=(db, generation), daemon=True)
+    gc.start()
+    new_count = sum(1 for _, _, is_new in assigned if is_new)
+    return {"new": new_count, "repeated": len(assigned) - new_count, "published": len(latest)}, gc
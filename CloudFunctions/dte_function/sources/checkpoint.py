@@ -0,0 +1,148 @@
+import hashlib
+import math
+
+from google.cloud import firestore
+
+class BloomFilter:
+    """Fixed-size Bloom filter over string IDs, serialisable to bytes for Firestore."""
+
+    def __init__(self, capacity=5000, error_rate=0.01, bits=None, hashes=None, data=None, count=0):
+        self.capacity = capacity
+        self.bits = bits or int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = hashes or max(1, round(self.bits / capacity * math.log(2)))
+        self.data = bytearray(data) if data else bytearray((self.bits + 7) // 8)
+        self.count = count
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(str(item).encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.data[pos // 8] |= 1 << (pos % 8)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.data[pos // 8] & (1 << (pos % 8)) for pos in self._positions(item))
+
+    @property
+    def saturated(self):
+        return self.count >= self.capacity
+
+DEFAULT_CONSUMER = "media_agent"
+PENDING_STATE_PREFIX = "pending_checkpoint_"
+
+class CheckpointStore:
+    """
+    Per-consumer, per-source ingest checkpoint: a watermark (newest created
+    timestamp and ID seen) plus a Bloom filter of every ID already processed.
+    Stored as one Firestore document per consumer and source in `collection`,
+    so each pipeline reading a source gets its own delta.
+
+    peek() only reads. Its pending record is committed with commit() once the
+    caller's pipeline has succeeded, so a failed run sees the same items again.
+    """
+
+    def __init__(self, collection="ingest_checkpoints", client_factory=None):
+        self.collection = collection
+        self._client_factory = client_factory or (lambda: firestore.Client("cityinsightmaps"))
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = self._client_factory()
+        return self._client
+
+    def _ref(self, consumer, source):
+        return self.client.collection(self.collection).document(f"{consumer}__{source}")
+
+    @staticmethod
+    def _parse(data):
+        bloom = BloomFilter(
+            bits=data.get("bloom_bits"),
+            hashes=data.get("bloom_hashes"),
+            data=data.get("bloom"),
+            count=data.get("bloom_count", 0),
+        )
+        return data.get("last_created_utc") or 0, data.get("last_id"), bloom, data.get("bloom_floor") or 0
+
+    def _load(self, consumer, source):
+        doc = self._ref(consumer, source).get()
+        return self._parse(doc.to_dict() if doc.exists else {})
+
+    def peek(self, consumer, source, items, limit=None, id_key="id", created_key="created_utc"):
+        """
+        Returns (fresh, pending): up to `limit` items `consumer` has not
+        processed yet, and the record to pass to commit() once it has.
+        Nothing is written; unseen items beyond the limit are left for later.
+        Items newer than the watermark are new outright; older ones are checked
+        against the Bloom filter (they may have been cut off by a listing limit).
+        Items at or below bloom_floor predate the current filter and count as seen;
+        items without a timestamp rely on the filter alone.
+        """
+        last_created_utc, _, bloom, bloom_floor = self._load(consumer, source)
+
+        fresh = []
+        for item in items:
+            item_id = item.get(id_key)
+            created = item.get(created_key) or 0
+            if created > last_created_utc or ((not created or created > bloom_floor) and item_id not in bloom):
+                fresh.append(item)
+        fresh = fresh[:limit]
+        if not fresh:
+            return [], None
+
+        newest = max(fresh, key=lambda item: item.get(created_key) or 0)
+        pending = {
+            "consumer": consumer,
+            "source": source,
+            "ids": [item.get(id_key) for item in fresh],
+            "last_created_utc": newest.get(created_key) or 0,
+            "last_id": newest.get(id_key),
+        }
+        return fresh, pending
+
+    def commit(self, pending):
+        """
+        Records peek() results as processed. Each (consumer, source) document
+        is updated in a transaction, so concurrent instances don't lose IDs.
+        Accepts one pending record or a list; None entries are skipped.
+        """
+        for record in pending if isinstance(pending, list) else [pending]:
+            if record and record.get("ids"):
+                self._commit_one(record)
+
+    def _commit_one(self, record):
+        ref = self._ref(record["consumer"], record["source"])
+
+        @firestore.transactional
+        def apply(transaction):
+            snap = ref.get(transaction=transaction)
+            last_created_utc, last_id, bloom, bloom_floor = self._parse(snap.to_dict() if snap.exists else {})
+            if bloom.saturated:
+                bloom, bloom_floor = BloomFilter(capacity=bloom.capacity), last_created_utc
+            for item_id in record["ids"]:
+                bloom.add(item_id)
+            if record["last_created_utc"] >= last_created_utc:
+                last_created_utc, last_id = record["last_created_utc"], record["last_id"]
+            transaction.set(ref, {
+                "last_created_utc": last_created_utc,
+                "last_id": last_id,
+                "bloom_floor": bloom_floor,
+                "bloom": bytes(bloom.data),
+                "bloom_bits": bloom.bits,
+                "bloom_hashes": bloom.hashes,
+                "bloom_count": bloom.count,
+                "updated_at": firestore.SERVER_TIMESTAMP,
+            })
+
+        apply(self.client.transaction())
+
+def pending_from_state(state):
+    """The pending records an agent run left in its session state."""
+    return [value for key, value in (state or {}).items() if key.startswith(PENDING_STATE_PREFIX) and value]
+
+checkpoints = CheckpointStore()
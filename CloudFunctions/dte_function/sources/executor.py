@@ -0,0 +1,94 @@
+import importlib
+import os
+import threading
+
+# Runs an agent behind one interface, either remotely on Agent Engine or
+# in-process with reasoning_engines.AdkApp around the same root_agent that is
+# deployed. "local" needs the agent package (mm_agent, dte_agent, ...) deployed
+# alongside the function; it is only imported in that mode.
+
+EXECUTOR_MODE = os.getenv("AGENT_EXECUTOR", "remote")  # "remote" or "local"
+
+class RemoteExecutor:
+    """An Agent Engine deployment, looked up once."""
+
+    mode = "remote"
+
+    def __init__(self, resource_name):
+        from vertexai import agent_engines
+        self.name = resource_name
+        self._engine = agent_engines.get(resource_name)
+
+    def create_session(self, user_id, state=None):
+        return self._engine.create_session(user_id=user_id, state=state or {})["id"]
+
+    def session_state(self, user_id, session_id):
+        return self._engine.get_session(user_id=user_id, session_id=session_id).get("state", {})
+
+    def stream_query(self, user_id, session_id, message):
+        yield from self._engine.stream_query(user_id=user_id, session_id=session_id, message=message)
+
+class LocalExecutor:
+    """module.root_agent wrapped in an in-process AdkApp, built once per instance."""
+
+    mode = "local"
+
+    def __init__(self, module_name):
+        from vertexai.preview import reasoning_engines
+        self.name = module_name
+        root_agent = importlib.import_module(module_name).root_agent
+        self._app = reasoning_engines.AdkApp(agent=root_agent, enable_tracing=False)
+
+    def create_session(self, user_id, state=None):
+        session = self._app.create_session(user_id=user_id, state=state or {})
+        return session.id if hasattr(session, "id") else session["id"]
+
+    def session_state(self, user_id, session_id):
+        session = self._app.get_session(user_id=user_id, session_id=session_id)
+        return dict(session.state) if hasattr(session, "state") else session.get("state", {})
+
+    def stream_query(self, user_id, session_id, message):
+        yield from self._app.stream_query(user_id=user_id, session_id=session_id, message=message)
+
+_executors = {}
+_lock = threading.Lock()
+
+def get_executor(remote_id, local_module, mode=None):
+    """
+    The executor for one agent, by its Agent Engine resource name and the
+    module holding its root_agent. mode defaults to AGENT_EXECUTOR. Executors
+    are reused for the life of the instance.
+    """
+    mode = (mode or EXECUTOR_MODE).lower()
+    key = (mode, remote_id if mode == "remote" else local_module)
+    with _lock:
+        if key not in _executors:
+            if mode == "local":
+                _executors[key] = LocalExecutor(local_module)
+            elif mode == "remote":
+                _executors[key] = RemoteExecutor(remote_id)
+            else:
+                raise ValueError(f"Unknown agent executor mode: {mode}")
+        return _executors[key]
+
+def stream_parts(executor, user_id, message, session_id=None):
+    """One message, in a new session unless session_id is given; yields the content parts of every event."""
+    session_id = session_id or executor.create_session(user_id)
+    for event in executor.stream_query(user_id, session_id, message):
+        yield from event.get("content", {}).get("parts", [])
+
+def _join_text(parts):
+    return "\n".join(part["text"].strip() for part in parts if "text" in part).strip()
+
+def run_text(executor, user_id, message):
+    """The text parts of the answer, each stripped, one per line."""
+    return _join_text(stream_parts(executor, user_id, message))
+
+def run_session(executor, user_id, message, state=None):
+    """
+    Like run_text, in a session seeded with `state`. Returns (text, final
+    session state), for agents that leave results in state.
+    """
+    session_id = executor.create_session(user_id, state)
+    text = _join_text(stream_parts(executor, user_id, message, session_id))
+    return text, executor.session_state(user_id, session_id)
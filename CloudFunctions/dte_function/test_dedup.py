@@ -0,0 +1,86 @@
+# Pins the dedup threshold against reworded repeats and distinct events that
+# share a (locality, event_type) bucket. Run with: python -m pytest test_dedup.py
+
+import pytest
+
+from dedup import SIMILARITY_THRESHOLD, assign_event_ids, minhash, similarity
+
+# The same story as two runs of the agents wrote it
+REWORDED = [
+    ("Patchy rain expected across the city with light showers in the evening.",
+     "Light patchy rain is likely in the evening across Bengaluru."),
+    ("Patchy rain reported in Koramangala this afternoon.",
+     "Koramangala sees patchy rain in the afternoon."),
+    ("Residents report a digital arrest scam where fraudsters posed as CBI officers.",
+     "Fraudsters posing as CBI officers ran a digital arrest scam on residents."),
+    ("Heavy traffic jam at Silk Board junction due to waterlogging.",
+     "Waterlogging causes a heavy traffic jam at the Silk Board junction."),
+    ("Power cut in Jayanagar 4th block from 10 am to 4 pm for maintenance work.",
+     "BESCOM maintenance work: power cut in Jayanagar 4th block, 10 am to 4 pm."),
+    ("Tree fall blocks the road near Indiranagar 100 Feet Road.",
+     "A fallen tree is blocking 100 Feet Road in Indiranagar."),
+]
+
+# Different events of the same type at the same place
+DISTINCT = [
+    ("Patchy rain expected across the city with light showers in the evening.",
+     "Heatwave warning issued as temperatures touch 36 degrees."),
+    ("Heavy traffic jam at Silk Board junction due to waterlogging.",
+     "Traffic diverted at Silk Board for metro construction work over the weekend."),
+    ("Residents report a digital arrest scam where fraudsters posed as CBI officers.",
+     "Chain snatching incident reported near the bus stop at night."),
+    ("Power cut in Jayanagar 4th block from 10 am to 4 pm for maintenance work.",
+     "Transformer blast leaves Jayanagar 9th block without power overnight."),
+    ("Tree fall blocks the road near Indiranagar 100 Feet Road.",
+     "Pothole on 100 Feet Road in Indiranagar causes two-wheeler accident."),
+    ("Patchy rain reported in Koramangala this afternoon.",
+     "Thunderstorm with hail lashes Koramangala, several roads flooded."),
+]
+
+@pytest.mark.parametrize("first, second", REWORDED)
+def test_reworded_repeat_matches(first, second):
+    assert similarity(minhash(first), minhash(second)) >= SIMILARITY_THRESHOLD
+
+@pytest.mark.parametrize("first, second", DISTINCT)
+def test_distinct_events_stay_apart(first, second):
+    assert similarity(minhash(first), minhash(second)) < SIMILARITY_THRESHOLD
+
+def test_signatures_of_another_size_never_match():
+    assert similarity(minhash("patchy rain")[:32], minhash("patchy rain")) == 0.0
+
+class _Ref:
+    def __init__(self, doc_id):
+        self.id = doc_id
+
+class _Snapshot:
+    def __init__(self, doc_id, data):
+        self.id, self._data, self.exists = doc_id, data, data is not None
+
+    def to_dict(self):
+        return self._data
+
+class _IndexDB:
+    """Just enough of a Firestore client for assign_event_ids: an in-memory event_dedup."""
+
+    def __init__(self):
+        self.docs = {}
+
+    def collection(self, name):
+        return self
+
+    def document(self, doc_id):
+        return _Ref(doc_id)
+
+    def get_all(self, refs):
+        return [_Snapshot(ref.id, self.docs.get(ref.id)) for ref in refs]
+
+def test_reworded_repeat_extends_the_first_event():
+    db = _IndexDB()
+    event = {"locality": "Koramangala", "event_type": "weather", "description": REWORDED[1][0]}
+    assigned, buckets = assign_event_ids(db, [event], "event_1", 1000, "t1")
+    db.docs = {bid: {"entries": entries} for bid, entries in buckets.items()}
+
+    repeat = {**event, "description": REWORDED[1][1]}
+    (event_id, doc, is_new), = assign_event_ids(db, [repeat], "event_2", 2000, "t2")[0]
+    assert (event_id, is_new) == (assigned[0][0], False)
+    assert (doc["first_seen"], doc["last_seen"], doc["seen_count"]) == ("t1", "t2", 2)
@@ -4,9 +4,12 @@ from datetime import datetime, timedelta, timezone
 from google.cloud import firestore
 import vertexai
 from vertexai import agent_engines
+from sources.checkpoint import checkpoints, pending_from_state
 
 # Define IST timezone
 IST = timezone(timedelta(hours=5, minutes=30))
+# Source checkpoints are kept per consumer, so dte_function still sees the items this run takes
+CHECKPOINT_CONSUMER = "media_agent_function"
 
 # Cloud Function entry point
 def main(request):
@@ -19,7 +22,7 @@ def main(request):
     )
 
     # Create a session
-    session = agent_engine.create_session(user_id="cloud_function_trigger")
+    session = agent_engine.create_session(user_id="cloud_function_trigger", state={"consumer": CHECKPOINT_CONSUMER})
     session_id = session["id"]
 
     # Query the agent
@@ -34,6 +37,16 @@ def main(request):
             if "text" in part:
                 fused_text += part["text"].strip() + "\n"
 
+    # The agent leaves its source checkpoint records in the session, for us to
+    # commit once the summary is stored
+    state = agent_engine.get_session(user_id="cloud_function_trigger", session_id=session_id).get("state", {})
+    pending = pending_from_state(state)
+
+    # Media tools only return unseen items; skip the write when nothing is new
+    if fused_text.strip() == "NO_NEW_ITEMS":
+        checkpoints.commit(pending)
+        return {"status": "skipped", "summary": ""}, 200
+
     # Prepare Firestore doc name and IST timestamp
     now_ist = datetime.now(IST)
     doc_name = f"event_{now_ist.strftime('%Y%m%d_%H%M%S')}"
@@ -44,5 +57,6 @@ def main(request):
         "timestamp": now_ist.isoformat(),
         "description": fused_text.strip()
     })
+    checkpoints.commit(pending)
 
     return {"status": "success", "summary": fused_text.strip()}, 200
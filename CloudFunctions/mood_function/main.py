@@ -1,60 +1,123 @@
 # main.py
 
+import importlib
 import json
+import os
 from datetime import datetime, timedelta, timezone
 from google.cloud import firestore
 import vertexai
-from vertexai import agent_engines
+from sources.executor import EXECUTOR_MODE, get_executor, run_text
+from sources.gazetteer import MOOD_LOCALITIES
+from sources.reddit import reddit_feed
+from sources.sentiment import prefilter
+from sources.toi import toi_feed
+from mood_schema import MoodOutputError, repair_mood_output
 
 PROJECT_ID = "cityinsightmaps"
 LOCATION = "us-central1"
 MOOD_AGENT_ID = "projects/cityinsightmaps/locations/us-central1/reasoningEngines/1031984021644509184"
 MJSON_AGENT_ID = "projects/cityinsightmaps/locations/us-central1/reasoningEngines/1653480770221637632"
+# Packages holding the same root_agents, for AGENT_EXECUTOR=local
+MOOD_AGENT_MODULE = "mm_agent.agent"
+MJSON_AGENT_MODULE = "mjson_agent.agent"
 IST = timezone(timedelta(hours=5, minutes=30))
+MJSON_FALLBACK = os.getenv("MOOD_MJSON_FALLBACK", "true").lower() == "true"
+
+MOOD_FIELDS = ("locality", "mood", "mood_number", "reason")
+
+def source_feeds(executor_mode=None):
+    """
+    The RedditFeed and FeedCache to score with. In local mode mm_agent runs in
+    this process and its tools use mm_agent.sources, its own copy of these
+    modules; scoring with those instances lets the agent reuse the listings
+    already fetched instead of fetching both sources again.
+    """
+    if (executor_mode or EXECUTOR_MODE).lower() == "local":
+        package = MOOD_AGENT_MODULE.rsplit(".", 1)[0]
+        return (importlib.import_module(f"{package}.sources.reddit").reddit_feed,
+                importlib.import_module(f"{package}.sources.toi").toi_feed)
+    return reddit_feed, toi_feed
+
+def score_locally(executor_mode=None):
+    """
+    Lexicon mood for every mood locality. Returns (settled, pending, scores):
+    settled entries are final, pending localities still need the agents.
+    If the feeds can't be read, every locality is left to the agents.
+    """
+    try:
+        scores = prefilter(MOOD_LOCALITIES, *source_feeds(executor_mode))
+    except Exception as e:
+        print(f"⚠️ Local mood scoring failed, using agents for all localities: {e}")
+        return [], list(MOOD_LOCALITIES), {}
+
+    settled = [
+        {**{k: s[k] for k in MOOD_FIELDS}, "source": "lexicon"}
+        for s in scores.values() if not s["needs_llm"]
+    ]
+    pending = [locality for locality, s in scores.items() if s["needs_llm"]]
+    return settled, pending, scores
+
+def run_agents(pending, scores, timestamp_str, executor_mode=None):
+    """
+    One mood_map_agent session for the pending localities; its JSON answer is
+    validated and repaired locally. mjson_agent is only called when no JSON
+    can be recovered from it. Returns (agent_text, moods).
+    """
+    message = f"Generate the mood map for these Bengaluru localities only: {', '.join(pending)}"
+    hints = {l: scores[l]["evidence"] for l in pending if scores.get(l, {}).get("evidence")}
+    if hints:
+        message += f"\nLocal evidence gathered so far (may be thin or mixed):\n{json.dumps(hints, ensure_ascii=False)}"
+
+    mood_text = run_text(get_executor(MOOD_AGENT_ID, MOOD_AGENT_MODULE, executor_mode), "mood_map_trigger", message)
+    try:
+        output = repair_mood_output(mood_text, pending, timestamp_str)
+    except MoodOutputError as e:
+        if not MJSON_FALLBACK:
+            raise
+        print(f"⚠️ {e}; falling back to mjson_agent")
+        mjson = get_executor(MJSON_AGENT_ID, MJSON_AGENT_MODULE, executor_mode)
+        structured_text = run_text(mjson, "mjson_trigger", f"{timestamp_str}\n{mood_text}")
+        output = repair_mood_output(structured_text, pending, timestamp_str)
+
+    moods = [{**m, "source": "llm"} for m in output["moods"]]
+    # Localities the agent skipped keep their lexicon reading, however thin
+    for locality in output["missing"]:
+        s = scores.get(locality)
+        if s:
+            moods.append({**{k: s[k] for k in MOOD_FIELDS}, "source": "lexicon"})
+        else:
+            moods.append({"locality": locality, "mood": "unable to gauge", "mood_number": 1,
+                          "reason": "No mood reported for this locality.", "source": "none"})
+    return mood_text, moods
 
 def main(request):
-    vertexai.init(project=PROJECT_ID, location=LOCATION)
     db = firestore.Client()
 
     now = datetime.now(IST)
     timestamp_str = now.isoformat()
     doc_name = f"mood_{now.strftime('%Y%m%d_%H%M%S')}"
 
-    # Call mood_map_agent
-    mood_agent = agent_engines.get(MOOD_AGENT_ID)
-    mood_session = mood_agent.create_session(user_id="mood_map_trigger")
-    mood_text = ""
+    args = request.args if request is not None else {}
+    executor_mode = args.get("executor", EXECUTOR_MODE).lower()
+    settled, pending, scores = score_locally(executor_mode)
+    mood_list, mood_text = list(settled), ""
+    print(f"🧮 Lexicon settled {len(settled)} localities, {len(pending)} left for the agents")
 
-    for event in mood_agent.stream_query(user_id="mood_map_trigger", session_id=mood_session["id"], message="Generate the mood map for Bengaluru"):
-        parts = event.get("content", {}).get("parts", [])
-        for part in parts:
-            if "text" in part:
-                mood_text += part["text"].strip() + "\n"
+    if pending:
+        vertexai.init(project=PROJECT_ID, location=LOCATION)
+        try:
+            mood_text, llm_moods = run_agents(pending, scores, timestamp_str, executor_mode)
+        except Exception as e:
+            return {"error": f"Failed to get moods from agents: {e}"}, 500
+        mood_list += llm_moods
 
     db.collection("raw_mood_data").document(doc_name).set({
         "timestamp": timestamp_str,
-        "mood_map": mood_text.strip()
+        "mood_map": "\n".join(f"{m['locality']}: {m['mood']}. {m['reason']}" for m in mood_list),
+        "agent_output": mood_text,
+        "lexicon_scores": scores,
     })
 
-    # Call mjson_agent
-    mjson_agent = agent_engines.get(MJSON_AGENT_ID)
-    mjson_session = mjson_agent.create_session(user_id="mjson_trigger")
-    structured_text = ""
-    combined_input = f"{timestamp_str}\n{mood_text.strip()}"
-
-    for event in mjson_agent.stream_query(user_id="mjson_trigger", session_id=mjson_session["id"], message=combined_input):
-        parts = event.get("content", {}).get("parts", [])
-        for part in parts:
-            if "text" in part:
-                structured_text += part["text"].strip()
-
-    try:
-        parsed = json.loads(structured_text)
-        mood_list = parsed.get("moods", [])
-        assert isinstance(mood_list, list)
-    except Exception as e:
-        return {"error": f"Failed to parse mood JSON:\n{structured_text}\n\nError: {e}"}, 500
-
     # Purge and update current_mood_data
     for doc in db.collection("current_mood_data").stream():
         doc.reference.delete()
@@ -67,5 +130,7 @@ def main(request):
     return {
         "status": "success",
         "raw_doc": doc_name,
-        "inserted": len(mood_list)
+        "inserted": len(mood_list),
+        "lexicon": sum(1 for m in mood_list if m["source"] == "lexicon"),
+        "llm": sum(1 for m in mood_list if m["source"] == "llm")
     }, 200
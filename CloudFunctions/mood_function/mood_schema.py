@@ -0,0 +1,105 @@
+import json
+import re
+from typing import List, Literal
+
+from pydantic import BaseModel, Field
+
+from sources.gazetteer import MOOD_LOCALITIES, resolve_locality
+from sources.sentiment import MOOD_NUMBERS
+
+# Local copy of mjson_agent's MoodMapOutput, plus a repair step so the mood
+# agent's JSON answer can be stored without a second model pass.
+
+class BengaluruMood(BaseModel):
+    locality: Literal[
+        "Majestic",
+        "MG Road",
+        "Electronic City",
+        "Whitefield",
+        "Koramangala",
+        "Indiranagar",
+        "Jayanagar",
+        "Hebbal",
+        "Silk Board"
+    ] = Field(..., description="One of the 9 predefined key localities in Bengaluru.")
+
+    mood: Literal["positive", "neutral", "negative", "angry", "unable to gauge"] = Field(
+        ..., description="Overall mood classification for the locality."
+    )
+
+    mood_number: int = Field(..., ge=1, le=5, description="Mood score from 1 (lowest) to 5 (highest).")
+
+    reason: str = Field(..., description="One-line summary explaining why this mood was assigned.")
+
+class MoodMapOutput(BaseModel):
+    timestamp: str = Field(..., description="Timestamp when the mood map was generated.")
+    moods: List[BengaluruMood] = Field(..., description="List of mood records per locality.")
+
+MOOD_SYNONYMS = {
+    "happy": "positive", "good": "positive", "upbeat": "positive", "optimistic": "positive",
+    "mixed": "neutral", "calm": "neutral", "normal": "neutral", "neutral-positive": "neutral",
+    "sad": "negative", "bad": "negative", "frustrated": "negative", "concerned": "negative",
+    "anger": "angry", "furious": "angry", "outraged": "angry",
+    "unknown": "unable to gauge", "unable to gage": "unable to gauge", "n/a": "unable to gauge",
+    "cannot gauge": "unable to gauge", "unable_to_gauge": "unable to gauge",
+}
+
+MAX_REASON_CHARS = 400
+
+class MoodOutputError(ValueError):
+    pass
+
+def extract_json(text):
+    """Parses the first JSON object or list in text, ignoring code fences and surrounding prose."""
+    text = re.sub(r"```(?:json)?", "", text or "").strip()
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        raise MoodOutputError("no JSON found in agent output")
+    start = min(starts)
+    end = text.rfind("}" if text[start] == "{" else "]")
+    try:
+        return json.loads(text[start:end + 1])
+    except ValueError as e:
+        raise MoodOutputError(f"agent output is not valid JSON: {e}")
+
+def _repair_entry(entry):
+    locality = resolve_locality(str(entry.get("locality", "")))
+    if locality not in MOOD_LOCALITIES:
+        return None
+    mood = str(entry.get("mood", "")).strip().lower()
+    mood = MOOD_SYNONYMS.get(mood, mood)
+    if mood not in MOOD_NUMBERS:
+        mood = "unable to gauge"
+    reason = " ".join(str(entry.get("reason") or "").split())[:MAX_REASON_CHARS]
+    # mood_number always follows the label, whatever the model wrote
+    return {"locality": locality, "mood": mood, "mood_number": MOOD_NUMBERS[mood], "reason": reason}
+
+def repair_mood_output(text, localities, timestamp):
+    """
+    Turns the mood agent's answer into a valid MoodMapOutput dict.
+
+    Accepts a {"moods": [...]} object or a bare list. Locality aliases are
+    resolved, mood labels normalised, mood_number made consistent with the
+    label, duplicates dropped (first wins) and entries outside `localities`
+    ignored. Requested localities the agent left out are returned in
+    `missing`. Raises MoodOutputError if no JSON can be recovered.
+    """
+    data = extract_json(text)
+    if isinstance(data, list):
+        data = {"moods": data}
+    if not isinstance(data, dict) or not isinstance(data.get("moods"), list):
+        raise MoodOutputError("agent output has no 'moods' list")
+
+    moods = {}
+    for entry in data["moods"]:
+        repaired = _repair_entry(entry) if isinstance(entry, dict) else None
+        if repaired and repaired["locality"] in localities and repaired["locality"] not in moods:
+            moods[repaired["locality"]] = repaired
+
+    output = MoodMapOutput(timestamp=timestamp, moods=list(moods.values())).model_dump()
+    output["missing"] = [l for l in localities if l not in moods]
+    return output
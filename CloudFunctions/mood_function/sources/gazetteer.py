@@ -0,0 +1,118 @@
+from collections import deque
+
+# Bengaluru localities and the names they go by in news and social posts.
+# Keys are canonical names; the first nine are the mood map localities.
+LOCALITY_ALIASES = {
+    "Majestic": ["Majestic", "Kempegowda Bus Station", "KBS", "KSR Bengaluru", "City Railway Station", "City Centre Majestic"],
+    "MG Road": ["MG Road", "M G Road", "M.G. Road", "Mahatma Gandhi Road"],
+    "Electronic City": ["Electronic City", "Electronics City", "E-City", "Ecity"],
+    "Whitefield": ["Whitefield", "ITPL"],
+    "Koramangala": ["Koramangala"],
+    "Indiranagar": ["Indiranagar", "Indira Nagar", "100 Feet Road"],
+    "Jayanagar": ["Jayanagar", "Jaya Nagar"],
+    "Hebbal": ["Hebbal", "Hebbal Flyover"],
+    "Silk Board": ["Silk Board", "Central Silk Board", "Silkboard"],
+    "Outer Ring Road": ["Outer Ring Road", "ORR"],
+    "Marathahalli": ["Marathahalli", "Marathalli"],
+    "Yelahanka": ["Yelahanka"],
+    "Malleshwaram": ["Malleshwaram", "Malleswaram"],
+    "BTM Layout": ["BTM Layout", "BTM"],
+    "HSR Layout": ["HSR Layout", "HSR"],
+    "KR Puram": ["KR Puram", "K R Puram", "Krishnarajapuram"],
+    "Bellandur": ["Bellandur"],
+    "Hosur Road": ["Hosur Road"],
+}
+
+MOOD_LOCALITIES = list(LOCALITY_ALIASES)[:9]
+
+def _key(name):
+    return " ".join(name.lower().replace(".", " ").replace("-", " ").split())
+
+_ALIAS_TO_LOCALITY = {
+    _key(alias): locality
+    for locality, aliases in LOCALITY_ALIASES.items()
+    for alias in aliases + [locality]
+}
+
+def resolve_locality(name):
+    """Returns the canonical locality for a name or alias, or None if unknown."""
+    return _ALIAS_TO_LOCALITY.get(_key(name or ""))
+
+class LocalityMatcher:
+    """
+    Aho-Corasick automaton over every locality name and alias, built once.
+    One pass over a text finds all mentions with their character spans.
+
+    Matching ignores case, except for all-caps acronyms such as ORR or KBS,
+    which must appear in capitals. A mention must start and end on a word
+    boundary, and overlapping mentions resolve to the leftmost, longest one.
+    """
+
+    def __init__(self, aliases_by_locality):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for locality, aliases in aliases_by_locality.items():
+            for alias in dict.fromkeys(aliases + [locality]):
+                self._add(alias, locality)
+        self._link()
+
+    def _add(self, alias, locality):
+        state = 0
+        for char in alias.lower():
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(alias), locality, alias if alias.isupper() else None))
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text):
+        """Returns [{"locality", "text", "start", "end"}] for every mention, in order."""
+        text = text or ""
+        # Per-character lowering keeps offsets aligned with the original text
+        lowered = "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+        candidates, state = [], 0
+        for i, char in enumerate(lowered):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, locality, exact in self._out[state]:
+                start, end = i - length + 1, i + 1
+                if exact and text[start:end] != exact:
+                    continue
+                if (start > 0 and text[start - 1].isalnum()) or (end < len(text) and text[end].isalnum()):
+                    continue
+                candidates.append((start, -length, locality))
+
+        mentions, covered = [], 0
+        for start, neg_length, locality in sorted(candidates):
+            if start >= covered:
+                covered = start - neg_length
+                mentions.append({"locality": locality, "text": text[start:covered], "start": start, "end": covered})
+        return mentions
+
+LOCALITY_MATCHER = LocalityMatcher(LOCALITY_ALIASES)
+
+def find_mentions(text):
+    """Every locality mention in text, with its span."""
+    return LOCALITY_MATCHER.find(text)
+
+def tag_localities(text):
+    """Returns the canonical localities mentioned in text, in order of first mention."""
+    return list(dict.fromkeys(m["locality"] for m in LOCALITY_MATCHER.find(text)))
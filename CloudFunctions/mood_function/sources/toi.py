@@ -0,0 +1,75 @@
+import calendar
+import threading
+import time
+
+import feedparser
+
+from .gazetteer import resolve_locality, tag_localities
+
+TOI_BENGALURU_RSS = "https://timesofindia.indiatimes.com/rssfeeds/-2128833038.cms"
+
+class FeedCache:
+    """
+    Keeps one parsed copy of an RSS feed. It is re-fetched at most once every
+    ttl_seconds with a conditional GET (ETag / Last-Modified). On each refresh
+    an inverted index from locality to entries is rebuilt, so searches are
+    dict lookups.
+    """
+
+    def __init__(self, url, ttl_seconds=300, clock=time.time):
+        self.url = url
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._fetched_at = None
+        self._etag = None
+        self._modified = None
+        self._entries = []
+        self._index = {}
+
+    def _refresh(self):
+        feed = feedparser.parse(self.url, etag=self._etag, modified=self._modified)
+        self._fetched_at = self._clock()
+        if getattr(feed, "status", None) == 304:
+            return
+        if not feed.entries and self._entries:
+            # Failed or empty fetch: keep serving the last good copy
+            return
+
+        self._etag = feed.get("etag")
+        self._modified = feed.get("modified")
+        self._entries = [
+            {
+                "id": entry.get("id", entry.get("link", "")),
+                "title": entry.title,
+                "summary": entry.get("summary", ""),
+                "link": entry.link,
+                "published": entry.get("published", ""),
+                "published_ts": calendar.timegm(entry.published_parsed) if entry.get("published_parsed") else 0,
+                "source": "timesofindia"
+            }
+            for entry in feed.entries
+        ]
+        index = {}
+        for article in self._entries:
+            article["localities"] = tag_localities(f"{article['title']} {article['summary']}")
+            for locality in article["localities"]:
+                index.setdefault(locality, []).append(article)
+        self._index = index
+
+    def entries(self):
+        with self._lock:
+            if self._fetched_at is None or self._clock() - self._fetched_at >= self.ttl_seconds:
+                self._refresh()
+            return self._entries
+
+    def search(self, locality):
+        entries = self.entries()
+        canonical = resolve_locality(locality)
+        if canonical:
+            return list(self._index.get(canonical, []))
+        # Not in the gazetteer: plain substring scan over the cached copy
+        needle = locality.lower()
+        return [a for a in entries if needle in f"{a['title']} {a['summary']}".lower()]
+
+toi_feed = FeedCache(TOI_BENGALURU_RSS)
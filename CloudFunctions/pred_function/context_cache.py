@@ -0,0 +1,85 @@
+import datetime
+import hashlib
+import os
+import threading
+
+from vertexai.generative_models import GenerativeModel
+from vertexai.preview import caching
+from vertexai.preview.generative_models import GenerativeModel as CachedGenerativeModel
+
+from digest import estimate_tokens
+
+# Vertex AI context caches for prompt prefixes shared by many calls: a static
+# instruction plus a per-refresh snapshot. A cache is keyed by a version of its
+# contents, so a new snapshot gets a new cache and the previous one is deleted.
+# Prefixes below the service's minimum size are not cached explicitly; they are
+# sent as the same system instruction every call, which keeps the prefix stable
+# for implicit caching.
+
+CACHE_TTL_SECONDS = int(os.getenv("CONTEXT_CACHE_TTL_SECONDS", "900"))
+# Vertex AI rejects explicit caches smaller than this; 1024 is only the
+# implicit caching threshold
+CACHE_MIN_TOKENS = int(os.getenv("CONTEXT_CACHE_MIN_TOKENS", "4096"))
+
+def content_version(*parts):
+    return hashlib.sha1("\x00".join(parts).encode("utf-8")).hexdigest()[:16]
+
+class ContextCache:
+    """
+    Hands out models whose prefix (system instruction + context) is cached.
+
+    cache.model(name, instruction, context) returns a model to call with only
+    the per-call delta. Each name holds one live cache at a time.
+    """
+
+    def __init__(self, model_name, ttl_seconds=CACHE_TTL_SECONDS, min_tokens=CACHE_MIN_TOKENS):
+        self.model_name = model_name
+        self.ttl_seconds = ttl_seconds
+        self.min_tokens = min_tokens
+        self._entries = {}  # name -> (version, model, cached_content or None, expires_at)
+        self._lock = threading.Lock()
+
+    def model(self, name, instruction, context):
+        version = content_version(self.model_name, instruction, context)
+        now = datetime.datetime.now(datetime.timezone.utc)
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry and entry[0] == version and entry[3] > now:
+                return entry[1]
+
+            model, cached = self._create(name, version, instruction, context)
+            expires_at = now + datetime.timedelta(seconds=self.ttl_seconds)
+            self._entries[name] = (version, model, cached, expires_at)
+
+        if entry and entry[2] is not None:
+            self._delete(entry[2])
+        return model
+
+    def _create(self, name, version, instruction, context):
+        if estimate_tokens(instruction + context) >= self.min_tokens:
+            try:
+                cached = caching.CachedContent.create(
+                    model_name=self.model_name,
+                    system_instruction=instruction,
+                    contents=[context],
+                    ttl=datetime.timedelta(seconds=self.ttl_seconds),
+                    display_name=f"{name}-{version}",
+                )
+                print(f"🗃️ Cached context {name} v{version}")
+                return CachedGenerativeModel.from_cached_content(cached_content=cached), cached
+            except Exception as e:
+                print(f"⚠️ Context cache for {name} failed, sending the prefix uncached: {e}")
+        return GenerativeModel(self.model_name, system_instruction=[instruction, context]), None
+
+    def _delete(self, cached):
+        try:
+            cached.delete()
+        except Exception as e:
+            print(f"⚠️ Could not delete an old context cache: {e}")
+
+    def clear(self):
+        with self._lock:
+            entries, self._entries = list(self._entries.values()), {}
+        for _, _, cached, _ in entries:
+            if cached is not None:
+                self._delete(cached)
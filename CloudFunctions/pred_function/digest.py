@@ -0,0 +1,192 @@
+import json
+import os
+from statistics import median
+
+try:
+    from .sources.gazetteer import tag_localities
+except ImportError:  # top-level module in pred_function
+    from sources.gazetteer import tag_localities
+
+# Reduces the current_* collections to a ranked situational digest for the
+# predictor: congested corridors, AQI outliers, rain flags and events, with
+# whatever touches the user's localities first. The digest is trimmed to a
+# hard token budget, lowest-ranked entries first.
+
+DIGEST_TOKEN_BUDGET = int(os.getenv("PRED_DIGEST_TOKEN_BUDGET", "600"))
+LOCAL_TOKEN_BUDGET = int(os.getenv("PRED_LOCAL_TOKEN_BUDGET", "200"))
+CONGESTION_THRESHOLD = 1.25  # duration / static duration
+TOP_CORRIDORS = 5
+TOP_EVENTS = 8
+EVENT_CHARS = 160
+RAIN_CONDITIONS = {"Rain", "Drizzle", "Thunderstorm"}
+URGENT_EVENT_TYPES = {"traffic", "weather", "powercut", "civil"}
+
+# The fixed points traffic, weather and AQI are collected for, by the
+# gazetteer locality each one stands for
+FIXED_POINTS = {
+    "City_Centre_Majestic": "Majestic",
+    "Koramangala": "Koramangala",
+    "Electronic_City": "Electronic City",
+    "Whitefield": "Whitefield",
+    "Yelahanka": "Yelahanka",
+    "Jayanagar": "Jayanagar",
+    "Indiranagar": "Indiranagar",
+    "Malleshwaram": "Malleshwaram",
+    "Marathahalli": "Marathahalli",
+}
+_POINT_BY_LOCALITY = {locality: point for point, locality in FIXED_POINTS.items()}
+
+def estimate_tokens(text):
+    """Same rough chars/4 estimate as the agents' sources/compact.py."""
+    return (len(text) + 3) // 4
+
+def points_in(text):
+    """Fixed points named in free text, in order of first mention, by the gazetteer matcher."""
+    return [_POINT_BY_LOCALITY[l] for l in tag_localities(text) if l in _POINT_BY_LOCALITY]
+
+def _label(point):
+    return point.replace("City_Centre_", "").replace("_", " ")
+
+def _first(docs):
+    return docs[0] if docs else {}
+
+def traffic_features(traffic_doc, user_points, top=TOP_CORRIDORS):
+    """
+    Corridors at or above CONGESTION_THRESHOLD, worst first. Corridors between
+    two of the user's points are listed separately whatever their congestion.
+    """
+    user_corridors, congested = [], []
+    for route in traffic_doc.get("routes", []):
+        factor = route.get("congestion_factor")
+        if route.get("status") != "success" or factor is None:
+            continue
+        entry = {
+            "route": f"{_label(route['source'])} → {_label(route['destination'])}",
+            "congestion": factor,
+            "minutes": round(route.get("duration_seconds", 0) / 60),
+            "delay_min": round((route.get("duration_seconds", 0) - route.get("static_duration_seconds", 0)) / 60),
+        }
+        if route["source"] in user_points and route["destination"] in user_points:
+            user_corridors.append(entry)
+        elif factor >= CONGESTION_THRESHOLD:
+            congested.append(entry)
+    user_corridors.sort(key=lambda e: -e["congestion"])
+    congested.sort(key=lambda e: -e["congestion"])
+    return user_corridors, congested[:top]
+
+def air_quality_features(aqi_doc, user_points):
+    """City median AQI (1-5 scale) and the points that are Poor or worse, or worse than the median."""
+    readings = [l for l in aqi_doc.get("locations", []) if l.get("aqi") is not None]
+    if not readings:
+        return None, []
+    city = median(l["aqi"] for l in readings)
+    flagged = [
+        l for l in readings
+        if l["aqi"] >= 4 or l["aqi"] > city or (l["name"] in user_points and l["aqi"] >= 3)
+    ]
+    flagged.sort(key=lambda l: (l["name"] not in user_points, -l["aqi"]))
+    outliers = [
+        {"place": _label(l["name"]), "aqi": l["aqi"], "category": l.get("aqi_category"),
+         "pm2_5": (l.get("components") or {}).get("pm2_5")}
+        for l in flagged
+    ]
+    return city, outliers
+
+def weather_features(weather_doc, user_points):
+    """Rain flags per point (the user's first) and a one-line city summary."""
+    located = [l for l in weather_doc.get("locations", []) if l.get("retrieval_status") == "success"]
+    raining = [l for l in located if (l.get("weather") or {}).get("main") in RAIN_CONDITIONS]
+    raining.sort(key=lambda l: l["name"] not in user_points)
+    rain = [{"place": _label(l["name"]), "condition": l["weather"].get("description")} for l in raining]
+    temps = [(l.get("temperature") or {}).get("actual") for l in located]
+    temps = [t for t in temps if t is not None]
+    conditions = [(l.get("weather") or {}).get("main") for l in located]
+    summary = None
+    if located:
+        common = max(set(conditions), key=conditions.count)
+        summary = f"{common}, {round(median(temps))}°C" if temps else common
+    return summary, rain
+
+def event_features(events, user_points, top=TOP_EVENTS):
+    """
+    Events ranked: near the user's points, then new ones (first seen this
+    run), then traffic/weather/power/civic ones. Descriptions are shortened.
+    """
+    ranked = []
+    for e in events:
+        places = " ".join([*(e.get("localities") or []), e.get("locality") or "", e.get("location") or ""])
+        near = bool(set(points_in(places)) & set(user_points))
+        is_new = e.get("seen_count", 1) == 1
+        description = " ".join((e.get("description") or "").split())
+        if len(description) > EVENT_CHARS:
+            description = description[:EVENT_CHARS].rsplit(" ", 1)[0] + "…"
+        ranked.append(((not near, not is_new, e.get("event_type") not in URGENT_EVENT_TYPES), {
+            "where": e.get("locality") or e.get("location"),
+            "type": e.get("event_type"),
+            "description": description,
+            **({"near_user": True} if near else {}),
+            **({"new": True} if is_new else {}),
+        }))
+    ranked.sort(key=lambda r: r[0])
+    return [entry for _, entry in ranked[:top]]
+
+# Entries are dropped from the end of these lists, in this order, until the
+# digest fits the budget
+_TRIM_ORDER = ("events", "congested_corridors", "aqi_outliers", "rain", "user_corridors")
+
+def fit_to_budget(digest, budget_tokens):
+    for key in _TRIM_ORDER:
+        while digest.get(key) and estimate_tokens(to_json(digest)) > budget_tokens:
+            digest[key].pop()
+    return digest
+
+def to_json(digest):
+    return json.dumps(digest, ensure_ascii=False, separators=(",", ":"), default=str)
+
+def build_digest(data, user_description, budget_tokens=DIGEST_TOKEN_BUDGET,
+                 top_corridors=TOP_CORRIDORS, top_events=TOP_EVENTS):
+    """
+    data: {collection: [docs]} as read from the current_* collections.
+    Returns the digest dict, at most budget_tokens by estimate_tokens once
+    serialized (the fixed header fields are never dropped).
+    """
+    user_points = points_in(user_description)
+    traffic = _first(data.get("current_traffic_data"))
+    weather = _first(data.get("current_weather_data"))
+    aqi = _first(data.get("current_airquality_data"))
+
+    user_corridors, congested = traffic_features(traffic, user_points, top_corridors)
+    city_aqi, aqi_outliers = air_quality_features(aqi, user_points)
+    weather_summary, rain = weather_features(weather, user_points)
+
+    digest = {
+        "as_of": {"traffic": traffic.get("timestamp"), "weather": weather.get("timestamp"), "aqi": aqi.get("timestamp")},
+        "user_places": [_label(p) for p in user_points],
+        "weather": weather_summary,
+        "city_aqi": city_aqi,
+        "rain": rain,
+        "user_corridors": user_corridors,
+        "congested_corridors": congested,
+        "aqi_outliers": aqi_outliers,
+        "events": event_features(data.get("current_events_data") or [], user_points, top_events),
+    }
+    return fit_to_budget(digest, budget_tokens)
+
+def local_digest(data, user_points, budget_tokens=LOCAL_TOKEN_BUDGET):
+    """
+    Only what concerns the given points: corridors between them, rain and AQI
+    at them, and events near them. Paired with build_digest(data, "") for the
+    city as a whole, so the city part can be shared between users.
+    """
+    labels = {_label(p) for p in user_points}
+    user_corridors, _ = traffic_features(_first(data.get("current_traffic_data")), user_points)
+    _, aqi_outliers = air_quality_features(_first(data.get("current_airquality_data")), user_points)
+    _, rain = weather_features(_first(data.get("current_weather_data")), user_points)
+    digest = {
+        "user_places": [_label(p) for p in user_points],
+        "rain": [r for r in rain if r["place"] in labels],
+        "user_corridors": user_corridors,
+        "aqi_outliers": [o for o in aqi_outliers if o["place"] in labels],
+        "events": [e for e in event_features(data.get("current_events_data") or [], user_points) if e.get("near_user")],
+    }
+    return fit_to_budget(digest, budget_tokens)
@@ -4,6 +4,7 @@ from google.cloud import firestore
 from datetime import datetime, timedelta, timezone
 import pytz
 import json
+from personalize import personalize
 
 # Config
 PROJECT_ID = "cityinsightmaps"
@@ -97,3 +98,31 @@ def main(request):
 
     except Exception as e:
         return {"status": "error", "message": str(e)}, 500
+
+def personalize_users(request):
+    """
+    Batch entry point: commentary for every profile in users, one generation
+    per home/work segment, written to user_pred_data keyed by user id.
+    """
+    try:
+        vertexai.init(project=PROJECT_ID, location=LOCATION)
+        db = firestore.Client()
+
+        now_ist = datetime.now(IST)
+        timestamp_str = now_ist.isoformat()
+        commentaries = personalize(db, timestamp_str)
+
+        db.collection("raw_pred_data").document(f"segments_{now_ist.strftime('%Y%m%d_%H%M%S')}").set({
+            "timestamp": timestamp_str,
+            "data": commentaries
+        })
+
+        return {
+            "status": "success",
+            "timestamp": timestamp_str,
+            "segments": len(commentaries),
+            "failed_segments": sum(1 for c in commentaries.values() if c is None)
+        }, 200
+
+    except Exception as e:
+        return {"status": "error", "message": str(e)}, 500
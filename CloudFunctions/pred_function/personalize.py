@@ -0,0 +1,161 @@
+import json
+import os
+import re
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from vertexai.generative_models import GenerationConfig
+
+from context_cache import ContextCache
+from digest import build_digest, local_digest, points_in, to_json
+
+# Batch personalization: the city digest is built once per refresh, users are
+# grouped into segments by home point and work point, and each segment gets
+# one generation. Model calls scale with the number of distinct segments,
+# not with the number of users. The instruction and city digest are the
+# shared prefix of every call; only the segment part changes.
+
+PRED_MODEL = os.getenv("PRED_MODEL", "gemini-2.5-flash")
+SEGMENT_WORKERS = int(os.getenv("PRED_SEGMENT_WORKERS", "8"))
+# The city digest is a cached prefix shared by every segment, so it can be
+# larger than the single-user digest
+CITY_TOKEN_BUDGET = int(os.getenv("PRED_CITY_TOKEN_BUDGET", "1500"))
+CITY_TOP_CORRIDORS = 10
+CITY_TOP_EVENTS = 20
+USERS_COLLECTION = "users"
+USER_PRED_COLLECTION = "user_pred_data"
+BATCH_SIZE = 500  # Firestore's limit on writes per batch
+
+# Same fixed documents and fields as pred_agent's tools.py
+LATEST_DOCS = {
+    "current_weather_data": "bengaluru_latest_weather",
+    "current_airquality_data": "bengaluru_latest_aqi",
+    "current_traffic_data": "latest",
+}
+DOC_FIELDS = ["timestamp", "locations", "routes"]
+EVENT_FIELDS = ["description", "event_type", "locality", "localities", "location", "seen_count"]
+
+INSTRUCTION = """You are a predictive analyzer for the city of Bengaluru.
+You are given a digest of the current situation in the city, then what concerns
+one group of users: the places they live and work in. Give a predictive one
+line commentary for these users. Dont just be a reporter. Be a predictor.
+
+Example Commentary: Dont say traffic jam at Electronic City.
+          Instead say, Avoid going through electronic city.. These are the work around
+          routes in case you need to travel.
+"""
+
+COMMENTARY_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {"commentary": {"type": "STRING"}},
+    "required": ["commentary"],
+}
+
+_HOME_CUES = re.compile(r"\b(live|living|stay|staying|home|reside|residing|resident)\b", re.IGNORECASE)
+_WORK_CUES = re.compile(r"\b(work|working|office|job|college|campus|commute|commuting)\b", re.IGNORECASE)
+_CLAUSES = re.compile(r"[.;,\n]|\band\b|\bbut\b", re.IGNORECASE)
+
+# Shared by all runs on a warm instance; a new city digest replaces the cached one
+context_cache = ContextCache(PRED_MODEL)
+
+def read_city_data(db):
+    """The current_* documents and the active events generation, with field masks."""
+    refs = [db.collection(col).document(doc_id) for col, doc_id in LATEST_DOCS.items()]
+    data = {col: [] for col in LATEST_DOCS}
+    for snap in db.get_all(refs, field_paths=DOC_FIELDS):
+        if snap.exists:
+            data[snap.reference.parent.id] = [snap.to_dict()]
+
+    pointer = db.collection("pipeline_state").document("current_events").get()
+    generation = pointer.to_dict().get("generation") if pointer.exists else None
+    query = db.collection("current_events_data")
+    if generation:
+        query = query.where("generation", "==", generation)
+    data["current_events_data"] = [doc.to_dict() for doc in query.select(EVENT_FIELDS).stream()]
+    return data
+
+def home_and_work(description):
+    """
+    (home, work) fixed points from a free-form profile. Clauses with a home or
+    work cue decide first; otherwise the first two points named, in order.
+    """
+    home = work = None
+    for clause in _CLAUSES.split(description or ""):
+        points = points_in(clause)
+        if not points:
+            continue
+        if _WORK_CUES.search(clause) and work is None:
+            work = points[0]
+        elif _HOME_CUES.search(clause) and home is None:
+            home = points[0]
+    rest = [p for p in points_in(description) if p not in (home, work)]
+    if home is None and rest:
+        home = rest.pop(0)
+    if work is None and rest:
+        work = rest.pop(0)
+    return home, work
+
+def segment_id(home, work):
+    return f"{home or 'city'}__{work or home or 'city'}"
+
+def segment_users(users):
+    """users: {user_id: description}. Returns {segment_id: {"points": [...], "users": [user_id, ...]}}."""
+    segments = defaultdict(lambda: {"points": [], "users": []})
+    for user_id, description in users.items():
+        home, work = home_and_work(description)
+        segment = segments[segment_id(home, work)]
+        segment["points"] = [p for p in dict.fromkeys((home, work)) if p]
+        segment["users"].append(user_id)
+    return dict(segments)
+
+def generate_commentary(model, segment_json):
+    response = model.generate_content(
+        f"These users:\n{segment_json}",
+        generation_config=GenerationConfig(
+            response_mime_type="application/json",
+            response_schema=COMMENTARY_SCHEMA,
+            temperature=0.2,
+        ),
+    )
+    return json.loads(response.text)["commentary"].strip()
+
+def personalize(db, timestamp_str):
+    """
+    Commentary for every user in USERS_COLLECTION, written to
+    user_pred_data/{user_id}. Returns {segment_id: commentary}; a segment whose
+    generation fails maps to None and its users are left as they were.
+    """
+    users = {
+        doc.id: (doc.to_dict() or {}).get("describe") or ""
+        for doc in db.collection(USERS_COLLECTION).select(["describe"]).stream()
+    }
+    segments = segment_users(users)
+    data = read_city_data(db)
+    city = build_digest(data, "", CITY_TOKEN_BUDGET, CITY_TOP_CORRIDORS, CITY_TOP_EVENTS)
+    city_context = f"City digest:\n{to_json(city)}"
+    model = context_cache.model("pred_city", INSTRUCTION, city_context)
+    print(f"👥 {len(users)} users in {len(segments)} segments")
+
+    def run(item):
+        sid, segment = item
+        try:
+            return sid, generate_commentary(model, to_json(local_digest(data, segment["points"])))
+        except Exception as e:
+            print(f"⚠️ Commentary failed for segment {sid}: {e}")
+            return sid, None
+
+    with ThreadPoolExecutor(max_workers=SEGMENT_WORKERS) as pool:
+        commentaries = dict(pool.map(run, segments.items()))
+
+    writes = [
+        (user_id, {"timestamp": timestamp_str, "commentary": commentaries[sid], "segment": sid})
+        for sid, segment in segments.items() if commentaries[sid]
+        for user_id in segment["users"]
+    ]
+    for start in range(0, len(writes), BATCH_SIZE):
+        batch = db.batch()
+        for user_id, doc in writes[start:start + BATCH_SIZE]:
+            batch.set(db.collection(USER_PRED_COLLECTION).document(user_id), doc)
+        batch.commit()
+    print(f"✅ Wrote commentary for {len(writes)} users")
+    return commentaries
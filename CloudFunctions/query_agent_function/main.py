@@ -1,7 +1,12 @@
 import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+import functions_framework
 import vertexai
 from vertexai import agent_engines
 from google.cloud import firestore
+from google.events.cloud import firestore as firestoredata
 
 # Initialize Vertex AI and Firestore
 vertexai.init(project="cityinsightmaps", location="us-central1")
@@ -10,56 +15,115 @@ agent_engine = agent_engines.get(
 )
 db = firestore.Client()
 
+# Prompts and responses are keyed by request ID (the prompt document ID).
+# Both collections carry an expires_at field for a Firestore TTL policy.
+PROMPT_COLLECTION = "current_user_prompt"
+RESPONSE_COLLECTION = "current_user_response"
+RESPONSE_TTL_MINUTES = int(os.getenv("RESPONSE_TTL_MINUTES", "30"))
+
+# Event-trigger bookkeeping: prompts that fail MAX_ATTEMPTS times are parked here
+DEAD_LETTER_COLLECTION = "query_dead_letter"
+MAX_ATTEMPTS = int(os.getenv("QUERY_MAX_ATTEMPTS", "3"))
+CLAIM_TIMEOUT_SECONDS = int(os.getenv("QUERY_CLAIM_TIMEOUT_SECONDS", "300"))
+
+def get_prompt(request_id):
+    doc = db.collection(PROMPT_COLLECTION).document(request_id).get()
+    if not doc.exists:
+        return None
+    return {"request_id": doc.id, **doc.to_dict()}
+
 def get_latest_prompt():
-    docs = db.collection("current_user_prompt").order_by("timestamp", direction=firestore.Query.DESCENDING).limit(1).stream()
+    # Legacy path for callers that don't send a request ID
+    docs = db.collection(PROMPT_COLLECTION).order_by("timestamp", direction=firestore.Query.DESCENDING).limit(1).stream()
     for doc in docs:
-        return doc.to_dict().get("prompt")
+        return {"request_id": doc.id, **doc.to_dict()}
     return None
 
-def get_weather(location_name):
-    doc = db.collection("current_weather_data").document("bengaluru_latest_weather").get()
-    if doc.exists:
-        return next((loc for loc in doc.to_dict().get("locations", []) if loc.get("name") == location_name), None)
-    return None
+# Latest-document snapshot shared across invocations on a warm instance
+SNAPSHOT_TTL_SECONDS = int(os.getenv("SNAPSHOT_TTL_SECONDS", "60"))
+_snapshot_cache = {"loaded_at": 0.0, "data": None}
 
-def get_air_quality(location_name):
-    doc = db.collection("current_airquality_data").document("bengaluru_latest_aqi").get()
-    if doc.exists:
-        return next((loc for loc in doc.to_dict().get("locations", []) if loc.get("name") == location_name), None)
-    return None
+# Query names that don't normalise onto the stored location names
+LOCATION_ALIASES = {
+    "majestic": "city centre majestic",
+    "city centre": "city centre majestic",
+    "ecity": "electronic city",
+}
 
-def get_traffic(location_name):
-    doc = db.collection("current_traffic_data").document("latest").get()
-    if doc.exists:
-        routes = doc.to_dict().get("routes", [])
-        return [r for r in routes if r.get("source") == location_name]
-    return None
+def normalize_location(name):
+    key = " ".join(str(name).replace("_", " ").lower().split())
+    return LOCATION_ALIASES.get(key, key)
+
+def load_city_snapshot():
+    """
+    Reads the latest weather, air quality and traffic documents in one batched
+    get_all call and indexes them by normalised location name.
+    """
+    now = time.monotonic()
+    if _snapshot_cache["data"] is not None and now - _snapshot_cache["loaded_at"] < SNAPSHOT_TTL_SECONDS:
+        return _snapshot_cache["data"]
+
+    refs = {
+        "weather": db.collection("current_weather_data").document("bengaluru_latest_weather"),
+        "air_quality": db.collection("current_airquality_data").document("bengaluru_latest_aqi"),
+        "traffic": db.collection("current_traffic_data").document("latest"),
+        "routes": db.collection("current_route_paths").document("latest"),
+    }
+    docs = {doc.reference.path: doc for doc in db.get_all(list(refs.values()))}
+
+    def doc_dict(ref):
+        doc = docs.get(ref.path)
+        return doc.to_dict() if doc is not None and doc.exists else {}
+
+    snapshot = {"weather": {}, "air_quality": {}, "traffic": {}, "routes": {}}
+    for loc in doc_dict(refs["weather"]).get("locations", []):
+        snapshot["weather"][normalize_location(loc.get("name", ""))] = loc
+    for loc in doc_dict(refs["air_quality"]).get("locations", []):
+        snapshot["air_quality"][normalize_location(loc.get("name", ""))] = loc
+    for route in doc_dict(refs["traffic"]).get("routes", []):
+        snapshot["traffic"].setdefault(normalize_location(route.get("source", "")), []).append(route)
+    for source, destinations in doc_dict(refs["routes"]).get("paths", {}).items():
+        snapshot["routes"][normalize_location(source)] = {
+            normalize_location(destination): entry for destination, entry in destinations.items()
+        }
+
+    _snapshot_cache["data"] = snapshot
+    _snapshot_cache["loaded_at"] = now
+    return snapshot
 
-def run_agent_session(query):
-    session_info = agent_engine.create_session(user_id="test-user")
+def get_weather(location_name, snapshot=None):
+    snapshot = snapshot or load_city_snapshot()
+    return snapshot["weather"].get(normalize_location(location_name))
+
+def get_air_quality(location_name, snapshot=None):
+    snapshot = snapshot or load_city_snapshot()
+    return snapshot["air_quality"].get(normalize_location(location_name))
+
+def get_traffic(location_name, snapshot=None):
+    snapshot = snapshot or load_city_snapshot()
+    return snapshot["traffic"].get(normalize_location(location_name))
+
+def run_agent_session(query, user_id="test-user"):
+    session_info = agent_engine.create_session(user_id=user_id)
     session_id = session_info["id"]
     collected = []
-    for event in agent_engine.stream_query(user_id="test-user", session_id=session_id, message=query):
+    for event in agent_engine.stream_query(user_id=user_id, session_id=session_id, message=query):
         parts = event.get("content", {}).get("parts", [])
         for part in parts:
             if "text" in part:
                 collected.append(part["text"])
     return "\n".join(collected)
 
-def push_combined_info(location_name: str, intent: str):
-    if intent.lower() != "information":
-        return "Intent is not 'information'."
-
-    weather_data = get_weather(location_name)
-    air_data = get_air_quality(location_name)
-    traffic_data = get_traffic(location_name)
+def build_location_info(location_name, snapshot):
+    weather_data = get_weather(location_name, snapshot)
+    air_data = get_air_quality(location_name, snapshot)
+    traffic_data = get_traffic(location_name, snapshot)
 
     if not (weather_data and air_data and traffic_data):
-        return f"Missing data for: {location_name}"
+        return None
 
-    combined_doc = {
+    return {
         "location": location_name,
-        "timestamp": firestore.SERVER_TIMESTAMP,
         "weather": {
             "temperature": weather_data.get("temperature", {}).get("actual"),
             "feels_like": weather_data.get("temperature", {}).get("feels_like"),
@@ -88,29 +152,219 @@ def push_combined_info(location_name: str, intent: str):
         ]
     }
 
-    # Clear and update Firestore
-    ref = db.collection("current_user_response")
-    for doc in ref.stream():
-        doc.reference.delete()
-    ref.add(combined_doc)
+def write_response(request_id, user_id, response, prompt_status="answered"):
+    """
+    Writes the response for one request and stamps its prompt for expiry in a
+    single batch commit; no collection scan, no other user's documents touched.
+    """
+    expires_at = datetime.now(timezone.utc) + timedelta(minutes=RESPONSE_TTL_MINUTES)
+    batch = db.batch()
+    batch.set(db.collection(RESPONSE_COLLECTION).document(request_id), {
+        **response,
+        "request_id": request_id,
+        "user_id": user_id,
+        "timestamp": firestore.SERVER_TIMESTAMP,
+        "expires_at": expires_at,
+    })
+    batch.set(db.collection(PROMPT_COLLECTION).document(request_id), {
+        "status": prompt_status,
+        "expires_at": expires_at,
+    }, merge=True)
+    batch.commit()
+
+def push_combined_info(locations: list[str], intent: str, request_id: str, user_id: str = None):
+    if intent.lower() != "information":
+        return "Intent is not 'information'."
+
+    # One snapshot read serves every location in the query
+    snapshot = load_city_snapshot()
+    results, missing = [], []
+    for location_name in dict.fromkeys(locations):
+        info = build_location_info(location_name, snapshot)
+        if info:
+            results.append(info)
+        else:
+            missing.append(location_name)
+
+    if not results:
+        return f"Missing data for: {', '.join(missing)}"
+
+    # Top-level fields mirror the first location for single-location readers
+    combined_doc = {
+        **results[0],
+        "locations": [r["location"] for r in results],
+        "results": results,
+        "missing": missing,
+    }
+    write_response(request_id, user_id, combined_doc)
+
+    summary = f"✅ Combined info for {', '.join(combined_doc['locations'])} inserted."
+    if missing:
+        summary += f" Missing data for: {', '.join(missing)}"
+    return summary
 
-    return f"✅ Combined info for {location_name} inserted."
+def push_navigation_info(source: str, destination: str, request_id: str, user_id: str = None):
+    """Answers a navigation query from the all-pairs table precomputed at traffic ingest."""
+    if not source or not destination:
+        return f"Navigation needs both a source and a destination (got {source!r} -> {destination!r})."
+
+    snapshot = load_city_snapshot()
+    entry = snapshot["routes"].get(normalize_location(source), {}).get(normalize_location(destination))
+    if not entry:
+        return f"No route data for: {source} -> {destination}"
+
+    write_response(request_id, user_id, {
+        "intent": "navigation",
+        "source": source,
+        "destination": destination,
+        "path": entry["path"],
+        "duration_seconds": entry["duration_seconds"],
+        "direct_duration_seconds": entry.get("direct_duration_seconds"),
+        "detour": entry.get("detour"),
+    })
+    return f"✅ Route {' -> '.join(entry['path'])} inserted."
+
+def route_prompt(request_id, prompt, user_id):
+    agent_output = run_agent_session(prompt, user_id)
+    parsed = json.loads(agent_output)
+    if parsed.get("intent", "").lower() == "navigation":
+        return push_navigation_info(parsed.get("source"), parsed.get("destination"), request_id, user_id), 200
+    locations = parsed.get("locations", [])
+    intent = parsed.get("intent", "information")
+    if not locations:
+        return "❌ No location found in agent output.", 400
+    return push_combined_info(locations, intent, request_id, user_id), 200
+
+def answer_prompt(request_id, prompt, user_id):
+    """
+    Runs the query for one prompt. Every outcome that stores no answer writes
+    an "unanswered" response with the reason, so the app's listener on
+    current_user_response/{request_id} always resolves and the prompt gets
+    its expires_at.
+    """
+    message, status = route_prompt(request_id, prompt, user_id)
+    if status != 200 or not message.startswith("✅"):
+        write_response(request_id, user_id, {"status": "unanswered", "message": message})
+    return message, status
 
 # ENTRYPOINT for Cloud Function
 def generate_city_info(request):
-    prompt = get_latest_prompt()
+    body = request.get_json(silent=True) or {}
+    request_id = body.get("request_id") or request.args.get("request_id")
+
+    prompt_doc = get_prompt(request_id) if request_id else get_latest_prompt()
+    if not prompt_doc or not prompt_doc.get("prompt"):
+        return "❌ No prompt found.", 400
+
+    user_id = body.get("user_id") or request.args.get("user_id") or prompt_doc.get("user_id") or "test-user"
+
+    # Same claim as the trigger, so a prompt is answered once whichever path
+    # reaches it first. Nothing redelivers an HTTP call: errors are final.
+    return handle_prompt_document(prompt_doc["request_id"], {"prompt": prompt_doc["prompt"], "user_id": user_id},
+                                  max_attempts=1)
+
+@firestore.transactional
+def _claim_prompt(transaction, prompt_ref):
+    """
+    Marks the prompt as processing. Returns the attempt number, or None when the
+    prompt is already answered, dead-lettered, or held by a live claim.
+    """
+    snapshot = prompt_ref.get(transaction=transaction)
+    data = snapshot.to_dict() or {}
+    status = data.get("status")
+    if status in ("answered", "failed"):
+        return None
+    claimed_at = data.get("claimed_at")
+    if status == "processing" and claimed_at and \
+            (datetime.now(timezone.utc) - claimed_at).total_seconds() < CLAIM_TIMEOUT_SECONDS:
+        return None
+    attempt = data.get("attempts", 0) + 1
+    transaction.set(prompt_ref, {
+        "status": "processing",
+        "claimed_at": datetime.now(timezone.utc),
+        "attempts": attempt,
+    }, merge=True)
+    return attempt
+
+def dead_letter(request_id, prompt_data, error):
+    db.collection(DEAD_LETTER_COLLECTION).document(request_id).set({
+        "request_id": request_id,
+        "prompt": prompt_data.get("prompt"),
+        "user_id": prompt_data.get("user_id"),
+        "error": error,
+        "timestamp": firestore.SERVER_TIMESTAMP,
+    })
+    write_response(request_id, prompt_data.get("user_id"), {"status": "error", "message": error}, prompt_status="failed")
+
+def handle_prompt_document(request_id, prompt_data, max_attempts=MAX_ATTEMPTS):
+    """
+    Processes one created prompt document at most once. Errors are retried by
+    re-raising (Eventarc redelivers) until max_attempts, then dead-lettered.
+    """
+    prompt = prompt_data.get("prompt")
+    user_id = prompt_data.get("user_id") or "test-user"
     if not prompt:
+        dead_letter(request_id, prompt_data, "Prompt document has no prompt text.")
         return "❌ No prompt found.", 400
 
+    prompt_ref = db.collection(PROMPT_COLLECTION).document(request_id)
+    attempt = _claim_prompt(db.transaction(), prompt_ref)
+    if attempt is None:
+        print(f"⏭️ Prompt {request_id} already handled, skipping duplicate delivery.")
+        return "⏭️ Duplicate delivery ignored.", 200
+
     try:
-        agent_output = run_agent_session(prompt)
-        parsed = json.loads(agent_output)
-        locations = parsed.get("locations", [])
-        intent = parsed.get("intent", "information")
-        if not locations:
-            return "❌ No location found in agent output.", 400
-        location_name = locations[0]
-        result = push_combined_info(location_name, intent)
-        return result, 200
+        message, status = answer_prompt(request_id, prompt, user_id)
     except Exception as e:
+        if attempt < max_attempts:
+            prompt_ref.set({"status": "retry"}, merge=True)
+            raise
+        dead_letter(request_id, prompt_data, f"{type(e).__name__}: {e}")
         return f"❌ Error: {str(e)}", 500
+    return message, status
+
+def decode_prompt_event(cloud_event):
+    """Returns (request_id, prompt_data) from a Firestore document.created event."""
+    payload = firestoredata.DocumentEventData()
+    payload._pb.ParseFromString(cloud_event.data)
+    document = payload.value
+    request_id = document.name.split("/")[-1]
+    prompt_data = {
+        key: value.string_value
+        for key, value in document.fields.items()
+        if key in ("prompt", "user_id")
+    }
+    return request_id, prompt_data
+
+# ENTRYPOINT for the Firestore trigger on current_user_prompt/{request_id}
+@functions_framework.cloud_event
+def on_prompt_created(cloud_event):
+    request_id, prompt_data = decode_prompt_event(cloud_event)
+    message, status = handle_prompt_document(request_id, prompt_data)
+    print(f"[{status}] {request_id}: {message}")
+
+def dispatch_local(prompt_data, request_id=None):
+    """
+    Local stand-in for the Firestore trigger: writes the prompt document and
+    hands it to the same handler the event path uses. Intended for tests and
+    scripts against the emulator.
+    """
+    ref = db.collection(PROMPT_COLLECTION).document(request_id) if request_id else db.collection(PROMPT_COLLECTION).document()
+    ref.set({**prompt_data, "timestamp": firestore.SERVER_TIMESTAMP}, merge=True)
+    return handle_prompt_document(ref.id, prompt_data)
+
+# ENTRYPOINT for the scheduled cleanup (fallback when no TTL policy is configured)
+def purge_expired_requests(request):
+    now = datetime.now(timezone.utc)
+    deleted = 0
+    for collection in (PROMPT_COLLECTION, RESPONSE_COLLECTION):
+        while True:
+            docs = list(db.collection(collection).where("expires_at", "<", now).limit(500).stream())
+            if not docs:
+                break
+            batch = db.batch()
+            for doc in docs:
+                batch.delete(doc.reference)
+            batch.commit()
+            deleted += len(docs)
+    return f"✅ Purged {deleted} expired request documents.", 200
@@ -1,11 +1,13 @@
 '''v2'''
 import os
-import requests
 from datetime import datetime
 from google.cloud import firestore
 import pytz  # 👈 Required for IST timezone handling
 from google.cloud import pubsub_v1
 import json
+from routing import precompute_paths
+from routes_api import compute_route
+from route_cache import RouteCache
 
 # Static location map
 BENGALURU_LOCATIONS = {
@@ -43,11 +45,35 @@ try:
 except Exception as e:
     print(f"Pub/Sub PublisherClient initialization failed at global scope: {e}")
 
-def parse_duration(duration_str):
+# Shared by all requests on a warm instance
+route_cache = RouteCache(
+    lambda origin, destination: compute_route(origin, destination, Maps_API_KEY),
+    precision=int(os.getenv("ROUTE_CACHE_GEOHASH_PRECISION", "6")),
+    bucket_seconds=int(os.getenv("ROUTE_CACHE_BUCKET_SECONDS", "300")),
+    max_entries=int(os.getenv("ROUTE_CACHE_MAX_ENTRIES", "1024")),
+)
+
+def route_lookup(request):
+    """
+    Google Cloud Function for navigation between arbitrary points.
+    Expects JSON {"origin": {"lat", "lon"}, "destination": {"lat", "lon"}} and
+    answers from route_cache, calling computeRoutes only on a miss.
+
+    Returns:
+        tuple: (JSON-serialisable dict, HTTP status code)
+    """
+    body = request.get_json(silent=True) or {}
     try:
-        return int(float(duration_str.replace("s", "")))
-    except:
-        return 0
+        origin = {"lat": float(body["origin"]["lat"]), "lon": float(body["origin"]["lon"])}
+        destination = {"lat": float(body["destination"]["lat"]), "lon": float(body["destination"]["lon"])}
+    except (KeyError, TypeError, ValueError):
+        return {"status": "error", "message": "origin and destination need lat/lon"}, 400
+
+    try:
+        route = route_cache.get(origin, destination)
+    except Exception as e:
+        return {"status": "error", "message": str(e), "cache": route_cache.stats()}, 502
+    return {"status": "success", "route": route, "cache": route_cache.stats()}, 200
 
 def traffic_handler(request):
     """
@@ -76,45 +102,12 @@ def traffic_handler(request):
             if source_name == dest_name:
                 continue
 
-            url = "https://routes.googleapis.com/directions/v2:computeRoutes"
-            headers = {
-                "Content-Type": "application/json",
-                "X-Goog-Api-Key": Maps_API_KEY,
-                "X-Goog-FieldMask": "routes.duration,routes.staticDuration,routes.distanceMeters"
-            }
-
-            data = {
-                "origin": {"location": {"latLng": {
-                    "latitude": source_coords["lat"],
-                    "longitude": source_coords["lon"]
-                }}},
-                "destination": {"location": {"latLng": {
-                    "latitude": dest_coords["lat"],
-                    "longitude": dest_coords["lon"]
-                }}},
-                "travelMode": "DRIVE",
-                "routingPreference": "TRAFFIC_AWARE",
-                "computeAlternativeRoutes": False,
-                "languageCode": "en-US",
-                "units": "METRIC"
-            }
-
             try:
-                resp = requests.post(url, headers=headers, json=data)
-                resp.raise_for_status()
-                route = resp.json()["routes"][0]
-
-                duration = parse_duration(route["duration"])
-                static = parse_duration(route["staticDuration"])
-                congestion = round(duration / static, 2) if static > 0 else None
-
+                route = compute_route(source_coords, dest_coords, Maps_API_KEY)
                 results.append({
                     "source": source_name,
                     "destination": dest_name,
-                    "distance_meters": route["distanceMeters"],
-                    "duration_seconds": duration,
-                    "static_duration_seconds": static,
-                    "congestion_factor": congestion,
+                    **route,
                     "status": "success"
                 })
             except Exception as e:
@@ -173,6 +166,16 @@ def traffic_handler(request):
         error_messages.append(error_msg)
         overall_status = 500
 
+    # ✅ 4. Precompute all-pairs shortest paths for navigation lookups
+    try:
+        db.collection("current_route_paths").document(FIXED_DOC_ID_CURRENT).set(precompute_paths(traffic_data))
+        print(f"✅ Stored all-pairs route lookup in 'current_route_paths' with ID: {FIXED_DOC_ID_CURRENT}")
+    except Exception as e:
+        error_msg = f"❌ Error precomputing route lookup: {e}"
+        print(error_msg)
+        error_messages.append(error_msg)
+        overall_status = 500
+
     # --- Publish to Pub/Sub (NEW) ---
     if pubsub_publisher_client and PUBSUB_TOPIC_ID_TRAFFIC:
         try:
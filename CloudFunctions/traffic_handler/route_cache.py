@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import OrderedDict
+
+# On-demand route cache for origin/destination pairs outside the fixed matrix.
+# Keys snap both endpoints to a geohash cell and the request time to a bucket,
+# so nearby requests within the same few minutes share one computeRoutes call.
+
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+def geohash_encode(lat, lon, precision=6):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class RouteCache:
+    """
+    LRU route cache with single-flight coalescing.
+
+    fetcher(origin, destination) is called at most once per key at a time;
+    concurrent callers for the same key wait for that call and share its result.
+    Points are {"lat": ..., "lon": ...} dicts, as in BENGALURU_LOCATIONS.
+    """
+
+    def __init__(self, fetcher, precision=6, bucket_seconds=300, max_entries=1024, clock=time.time):
+        self._fetcher = fetcher
+        self._precision = precision
+        self._bucket_seconds = bucket_seconds
+        self._max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def key(self, origin, destination):
+        return (
+            geohash_encode(origin["lat"], origin["lon"], self._precision),
+            geohash_encode(destination["lat"], destination["lon"], self._precision),
+            int(self._clock() // self._bucket_seconds),
+        )
+
+    def get(self, origin, destination):
+        key = self.key(origin, destination)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._fetcher(origin, destination)
+        except Exception as e:
+            flight.error = e
+            raise
+        else:
+            with self._lock:
+                self._entries[key] = flight.result
+                while len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+            return flight.result
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            flight.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "entries": len(self._entries),
+                "inflight": len(self._inflight),
+            }
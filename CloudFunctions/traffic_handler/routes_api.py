@@ -0,0 +1,58 @@
+import os
+import requests
+
+# Google Maps Routes API (computeRoutes). Override ROUTES_API_URL to point at a local stub.
+ROUTES_API_URL = os.getenv("ROUTES_API_URL", "https://routes.googleapis.com/directions/v2:computeRoutes")
+ROUTES_FIELD_MASK = "routes.duration,routes.staticDuration,routes.distanceMeters"
+
+def parse_duration(duration_str):
+    try:
+        return int(float(duration_str.replace("s", "")))
+    except:
+        return 0
+
+def build_routes_request(origin, destination, api_key):
+    """
+    Returns (headers, body) for a traffic-aware DRIVE route between two
+    {"lat": ..., "lon": ...} points.
+    """
+    headers = {
+        "Content-Type": "application/json",
+        "X-Goog-Api-Key": api_key,
+        "X-Goog-FieldMask": ROUTES_FIELD_MASK
+    }
+
+    data = {
+        "origin": {"location": {"latLng": {
+            "latitude": origin["lat"],
+            "longitude": origin["lon"]
+        }}},
+        "destination": {"location": {"latLng": {
+            "latitude": destination["lat"],
+            "longitude": destination["lon"]
+        }}},
+        "travelMode": "DRIVE",
+        "routingPreference": "TRAFFIC_AWARE",
+        "computeAlternativeRoutes": False,
+        "languageCode": "en-US",
+        "units": "METRIC"
+    }
+    return headers, data
+
+def compute_route(origin, destination, api_key, url=None, timeout=30):
+    """Calls computeRoutes and returns the route fields stored in the traffic matrix."""
+    headers, data = build_routes_request(origin, destination, api_key)
+    resp = requests.post(url or ROUTES_API_URL, headers=headers, json=data, timeout=timeout)
+    resp.raise_for_status()
+    route = resp.json()["routes"][0]
+
+    duration = parse_duration(route["duration"])
+    static = parse_duration(route["staticDuration"])
+    congestion = round(duration / static, 2) if static > 0 else None
+
+    return {
+        "distance_meters": route["distanceMeters"],
+        "duration_seconds": duration,
+        "static_duration_seconds": static,
+        "congestion_factor": congestion,
+    }
@@ -0,0 +1,115 @@
+import numpy as np
+
+# Congestion graph over the fixed location matrix.
+# Nodes are BENGALURU_LOCATIONS, edge weights are live duration_seconds.
+
+def build_duration_matrix(routes):
+    """
+    Turns the routes list written by traffic_handler into (nodes, matrix).
+    Failed or missing pairs are left at infinity.
+    """
+    nodes = sorted({r["source"] for r in routes} | {r["destination"] for r in routes})
+    index = {name: i for i, name in enumerate(nodes)}
+
+    matrix = np.full((len(nodes), len(nodes)), np.inf)
+    np.fill_diagonal(matrix, 0.0)
+    for r in routes:
+        if r.get("status", "success") != "success" or r.get("duration_seconds") is None:
+            continue
+        matrix[index[r["source"]], index[r["destination"]]] = float(r["duration_seconds"])
+    return nodes, matrix
+
+def floyd_warshall(matrix):
+    """
+    Vectorized all-pairs shortest paths. Returns (dist, next_hop) where
+    next_hop[i, j] is the node after i on the best i -> j path (-1 if unreachable).
+    """
+    n = matrix.shape[0]
+    dist = matrix.copy()
+    next_hop = np.where(np.isfinite(matrix), np.arange(n)[None, :], -1)
+
+    for k in range(n):
+        candidate = dist[:, k, None] + dist[None, k, :]
+        improved = candidate < dist
+        dist = np.where(improved, candidate, dist)
+        next_hop = np.where(improved, next_hop[:, k, None], next_hop)
+    return dist, next_hop
+
+def best_detours(matrix, next_hop):
+    """
+    For every pair, the fastest route whose first hop differs from the best
+    path's first hop and which does not come back through the source.
+    Returns (via, via_dist, avoid_next): via is that first hop (-1 if no such
+    route), and avoid_next[i] is the next_hop matrix of the graph without node
+    i, to rebuild the rest of the detour from via.
+    """
+    n = matrix.shape[0]
+    hops = np.arange(n)
+    via = np.full((n, n), -1)
+    via_dist = np.full((n, n), np.inf)
+    avoid_next = np.full((n, n, n), -1)
+
+    for i in range(n):
+        without = matrix.copy()
+        without[i, :] = np.inf
+        without[:, i] = np.inf
+        dist, avoid_next[i] = floyd_warshall(without)
+        # through[h, j] = edge i -> h, then h -> j without passing i again
+        through = matrix[i, :, None] + dist
+        excluded = (hops[:, None] == i) | (hops[:, None] == next_hop[i][None, :])
+        through = np.where(excluded, np.inf, through)
+
+        first = through.argmin(axis=0)
+        via_dist[i] = through[first, hops]
+        via[i] = np.where(np.isfinite(via_dist[i]), first, -1)
+    return via, via_dist, avoid_next
+
+def reconstruct_path(next_hop, i, j):
+    if next_hop[i, j] < 0:
+        return []
+    path = [i]
+    while i != j:
+        i = next_hop[i, j]
+        path.append(i)
+    return path
+
+def precompute_paths(traffic_data):
+    """
+    Builds the all-pairs lookup document stored alongside each traffic refresh:
+    paths[source][destination] = best path, its duration, the direct duration
+    and a detour suggestion.
+    """
+    nodes, matrix = build_duration_matrix(traffic_data.get("routes", []))
+    dist, next_hop = floyd_warshall(matrix)
+    via, via_dist, avoid_next = best_detours(matrix, next_hop)
+
+    def seconds(value):
+        return int(value) if np.isfinite(value) else None
+
+    paths = {}
+    for i, source in enumerate(nodes):
+        paths[source] = {}
+        for j, destination in enumerate(nodes):
+            if i == j or not np.isfinite(dist[i, j]):
+                continue
+            entry = {
+                "path": [nodes[n] for n in reconstruct_path(next_hop, i, j)],
+                "duration_seconds": seconds(dist[i, j]),
+                "direct_duration_seconds": seconds(matrix[i, j]),
+                "detour": None,
+            }
+            if via[i, j] >= 0:
+                k = via[i, j]
+                entry["detour"] = {
+                    "via": nodes[k],
+                    "path": [source] + [nodes[n] for n in reconstruct_path(avoid_next[i], k, j)],
+                    "duration_seconds": seconds(via_dist[i, j]),
+                }
+            paths[source][destination] = entry
+
+    return {
+        "timestamp": traffic_data.get("timestamp"),
+        "city": traffic_data.get("city"),
+        "nodes": nodes,
+        "paths": paths,
+    }